@@ -0,0 +1,39 @@
+"""Fluency analysis engine behind the Streamlit app.
+
+Submodules are imported on first attribute access, so ``import fluency``
+(and the cheap helpers in :mod:`fluency.cache`) do not pull in pandas.
+"""
+import importlib
+
+# Bump whenever a change alters the computed metrics, so persisted results are recomputed
+ANALYZER_VERSION = 4
+
+# Length in seconds of the moving-average window for the pace, and the choices offered
+ROLLING_WINDOW = 60
+ROLLING_WINDOWS = (30, 60, 120)
+
+_EXPORTS = {
+    "FILLER_WORDS": "fillers",
+    "FillerMatcher": "fillers",
+    "IncrementalAnalyzer": "incremental",
+    "Result": "engine",
+    "analyze": "engine",
+    "analyze_file": "engine",
+    "cached_analyze": "cache",
+    "detect_format": "formats",
+    "read_segments": "formats",
+    "ParseStats": "parsing",
+    "Segment": "parsing",
+    "iter_segments": "parsing",
+    "parse_transcript": "parsing",
+}
+
+__all__ = ["ANALYZER_VERSION", "ROLLING_WINDOW", "ROLLING_WINDOWS", *sorted(_EXPORTS)]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,170 @@
+"""Benchmarks on synthetic transcripts: ``python -m fluency bench``.
+
+:func:`synthetic_transcript` writes a transcript in the pasted YouTube
+layout with a Zipf-distributed vocabulary, filler words and the kind of
+noise real pastes carry (blank lines, "(Laughter)" rows, "[...]" asides,
+chapter headers). :func:`run_benchmark` then times every stage of the
+pipeline on it separately and, in a second pass under ``tracemalloc``,
+records each stage's peak memory, so tracing overhead does not distort
+the timings.
+"""
+import gc
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import ROLLING_WINDOW
+
+# Transcript lengths in minutes benchmarked by default: 10 minutes to 10 hours
+DEFAULT_MINUTES = (10, 60, 180, 600)
+
+NOISE_ROWS = ['(Laughter)', '(Applause)', '[Music]', '[...]']
+CHAPTER_HEADERS = ['Introduction', 'Chapter 2', 'Questions', 'Summary']
+FILLERS = ['uh', 'um']
+
+
+def synthetic_transcript(minutes, segments_per_minute=20, filler_rate=0.03, noise_rate=0.05,
+                         vocabulary=5000, words_per_segment=(3, 12), seed=0):
+    """Return a pasted-style transcript spanning about ``minutes`` minutes.
+
+    ``filler_rate`` is the share of words replaced by a filler and
+    ``noise_rate`` the share of segments that are noise rather than speech.
+    The same arguments always produce the same text.
+    """
+    rng = np.random.default_rng(seed)
+    n = max(1, int(minutes * segments_per_minute))
+    words = np.array([f'w{i}' for i in range(vocabulary)])
+    weights = 1.0 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+
+    # Segment start times: exponential gaps averaging 60 / segments_per_minute seconds
+    starts = np.cumsum(rng.exponential(60.0 / segments_per_minute, n)).astype(int)
+    lengths = rng.integers(words_per_segment[0], words_per_segment[1] + 1, n)
+    tokens = rng.choice(words, size=lengths.sum(), p=weights)
+    fillers = rng.random(len(tokens)) < filler_rate
+    tokens[fillers] = rng.choice(FILLERS, size=fillers.sum())
+    noise = rng.random(n) < noise_rate
+    noise_kind = rng.integers(0, 4, n)
+
+    lines = []
+    offset = 0
+    for i in range(n):
+        seconds = int(starts[i])
+        text = ' '.join(tokens[offset:offset + lengths[i]])
+        offset += lengths[i]
+        if noise[i]:
+            kind = noise_kind[i]
+            if kind == 0:
+                lines.append('')
+            elif kind == 1:
+                lines.append(CHAPTER_HEADERS[i % len(CHAPTER_HEADERS)])
+            elif kind == 2:
+                text = NOISE_ROWS[i % 2]
+            else:
+                text = f'{text} {NOISE_ROWS[2 + i % 2]}'
+        lines.append(f'{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}')
+        lines.append(text)
+    return '\n'.join(lines)
+
+
+def pipeline_stages(text, window=ROLLING_WINDOW, render=True):
+    """Return ``(name, callable)`` pairs running the pipeline one stage at a time, and their shared state.
+
+    The stages share state and must be called in order; each call builds a
+    fresh pipeline, so the timing and memory passes do not interfere.
+    """
+    from .engine import FILLER_WORDS, encode_tokens, metrics_frame, summarize
+    from .formats import read_segments
+    from .timeline import level_timeline
+
+    state = {}
+
+    def parse():
+        state['segments'], state['stats'], _fmt = read_segments(text)
+
+    def tokens():
+        state['tokens'], state['num_fillers'] = encode_tokens(state['segments'], FILLER_WORDS)
+
+    def metrics():
+        state['df'] = metrics_frame(state['segments'], state['tokens'], state['num_fillers'], window=window)
+
+    def levels():
+        state['result'] = summarize(state['df'], FILLER_WORDS, state['stats'], state['tokens'], window)
+        state['timeline'] = level_timeline(state['df'])
+
+    stages = [('parse', parse), ('tokenize', tokens), ('metrics', metrics), ('levels', levels)]
+    if render:
+        from .render import figure_png, wordcloud_image
+
+        def wordcloud():
+            state['wordcloud'] = wordcloud_image(state['result'].word_frequencies)
+
+        def figure():
+            state['png'] = figure_png(state['result'], state['wordcloud'])
+
+        stages += [('wordcloud', wordcloud), ('figure', figure)]
+    return stages, state
+
+
+def run_benchmark(minutes=DEFAULT_MINUTES, render=True, memory=True, **transcript_options):
+    """Benchmark every stage on a synthetic transcript of each length.
+
+    Returns a list of rows: ``minutes``, ``segments``, ``stage``,
+    ``seconds`` and ``peak_mb`` (``None`` when ``memory`` is off).
+    """
+    rows = []
+    for length in minutes:
+        text = synthetic_transcript(length, **transcript_options)
+        timings = {}
+        stages, state = pipeline_stages(text, render=render)
+        for name, stage in stages:
+            gc.collect()
+            started = time.perf_counter()
+            stage()
+            timings[name] = time.perf_counter() - started
+
+        peaks = {}
+        if memory:
+            tracemalloc.start()
+            try:
+                for name, stage in pipeline_stages(text, render=render)[0]:
+                    gc.collect()
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    stage()
+                    peaks[name] = (tracemalloc.get_traced_memory()[1] - baseline) / 2**20
+            finally:
+                tracemalloc.stop()
+
+        for name, seconds in timings.items():
+            rows.append({'minutes': length, 'segments': len(state['segments']), 'stage': name,
+                         'seconds': seconds, 'peak_mb': peaks.get(name)})
+    return rows
+
+
+def format_rows(rows):
+    lines = [f"{'minutes':>8} {'segments':>9} {'stage':<10} {'seconds':>9} {'peak MB':>9}"]
+    for row in rows:
+        peak = '-' if row['peak_mb'] is None else f"{row['peak_mb']:.1f}"
+        lines.append(f"{row['minutes']:>8g} {row['segments']:>9} {row['stage']:<10} {row['seconds']:>9.4f} {peak:>9}")
+    return '\n'.join(lines)
+
+
+def bench(args):
+    rows = run_benchmark(
+        minutes=args.minutes,
+        render=not args.no_render,
+        memory=not args.no_memory,
+        segments_per_minute=args.density,
+        filler_rate=args.filler_rate,
+        noise_rate=args.noise_rate,
+        seed=args.seed,
+    )
+    print(format_rows(rows))
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump(rows, fp, indent=2)
+    return 0
+
@@ -0,0 +1,84 @@
+"""In-process memoization of analyses, keyed by a hash of the transcript.
+
+The Streamlit page uses ``st.cache_data`` for the same purpose; this module
+is the equivalent layer for batch jobs and services that call the engine
+directly.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Number of analyses kept by cached_analyze
+CACHE_ENTRIES = 32
+
+
+def transcript_key(source, *params):
+    """Return a hex digest identifying ``source`` (text or bytes) and the analysis parameters."""
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    digest = hashlib.blake2b(source, digest_size=16)
+    for param in params:
+        digest.update(b'\0' + repr(param).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """A thread-safe mapping that keeps at most ``maxsize`` most recently used entries."""
+
+    def __init__(self, maxsize=CACHE_ENTRIES):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` to fill it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_MISSING = object()
+_results = LRUCache()
+
+
+def cached_analyze(source, filler_words=None, fmt=None, window=None):
+    """Like :func:`fluency.analyze`, but repeated calls with the same text are free.
+
+    ``source`` must be text or bytes so it can be hashed. The returned
+    :class:`~fluency.Result` is shared between callers and must not be mutated.
+    """
+    from . import ROLLING_WINDOW
+    from .engine import FILLER_WORDS, analyze
+
+    if filler_words is None:
+        filler_words = FILLER_WORDS
+    if window is None:
+        window = ROLLING_WINDOW
+    key = transcript_key(source, tuple(filler_words), fmt, window)
+    return _results.get_or_compute(key, lambda: analyze(source, filler_words, fmt, window))
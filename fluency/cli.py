@@ -0,0 +1,249 @@
+"""Command-line entry point: ``python -m fluency <command>``.
+
+``batch`` analyzes every transcript under the given paths on a process
+pool and streams one summary row per file to CSV or Parquet as results
+arrive::
+
+    python -m fluency batch transcripts/ --out results.csv
+    python -m fluency batch transcripts/ --out results.parquet --figures charts/
+
+``bench`` times each pipeline stage on synthetic transcripts of the given
+lengths (see :mod:`fluency.bench`)::
+
+    python -m fluency bench --minutes 10 60 600
+
+``serve`` runs a local HTTP JSON API for other programs (see
+:mod:`fluency.server`)::
+
+    python -m fluency serve --port 8000
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+
+from . import ROLLING_WINDOW, ROLLING_WINDOWS
+
+# File extensions picked up when a directory is given
+TRANSCRIPT_SUFFIXES = {'.txt', '.srt', '.vtt', '.json', '.json3'}
+
+# Parquet rows are buffered and written as one row group per this many files
+PARQUET_BATCH = 256
+
+
+def find_transcripts(paths):
+    """Yield ``(file, name)`` for transcript files from a mix of file and directory paths, recursively.
+
+    ``name`` is the file's path relative to the directory it was found in,
+    or just its file name when it was given directly.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            for file in sorted(p for p in path.rglob('*') if p.suffix.lower() in TRANSCRIPT_SUFFIXES and p.is_file()):
+                yield file, file.relative_to(path)
+        else:
+            yield path, Path(path.name)
+
+
+def figure_path(figures, name):
+    """Where the charts of transcript ``name`` go: the same relative path under ``figures``, plus ``.png``.
+
+    The transcript's suffix is kept, so ``talk.txt`` and ``talk.srt`` do not overwrite each other.
+    """
+    return Path(figures) / name.parent / f'{name.name}.png'
+
+
+def analyze_one(task):
+    """Worker: analyze one file and return ``(path, summary row, error)``."""
+    path, window, figure, filler_words = task
+    from .engine import analyze_file
+
+    try:
+        result = analyze_file(path, filler_words, window=window)
+        if figure:
+            from .render import figure_png, wordcloud_image
+
+            png = figure_png(result, wordcloud_image(result.word_frequencies))
+            Path(figure).parent.mkdir(parents=True, exist_ok=True)
+            Path(figure).write_bytes(png)
+    except Exception as e:
+        # One malformed file (e.g. an unrelated .json) must not abort the whole batch
+        return str(path), None, str(e) or type(e).__name__
+    return str(path), {'File': str(path), **result.summary()}, None
+
+
+class CSVSink:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+
+    def write(self, row):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Writing Parquet needs pyarrow: pip install pyarrow (or use a .csv output).") from None
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        # Explicit types, so a first batch where e.g. Max WPM is always missing does not fix the column as null
+        text, integer, number = pyarrow.string(), pyarrow.int64(), pyarrow.float64()
+        self.schema = pyarrow.schema([
+            ('File', text), ('Total Duration', text), ('Speaking Duration', text), ('Minutes', integer),
+            ('Unique Words', integer), ('WPM', number), ('Level', text), ('Max WPM', number),
+            ('Min WPM', number), ('Fillers Percentage', number),
+        ])
+        self.path = path
+        self.writer = None
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path):
+    if Path(path).suffix.lower() == '.parquet':
+        return ParquetSink(path)
+    return CSVSink(path)
+
+
+def filler_lexicon(value):
+    """A language code from LEXICONS, or fillers separated by commas."""
+    from .fillers import FILLER_WORDS, LEXICONS, parse_lexicon
+
+    if value is None:
+        return FILLER_WORDS
+    return LEXICONS.get(value) or parse_lexicon(value)
+
+
+def batch(args):
+    files = list(find_transcripts(args.paths))
+    if not files:
+        print("No transcripts found.", file=sys.stderr)
+        return 1
+    if args.figures:
+        os.makedirs(args.figures, exist_ok=True)
+
+    filler_words = filler_lexicon(args.fillers)
+    tasks = []
+    figures = set()
+    for path, name in files:
+        figure = None
+        if args.figures:
+            figure = figure_path(args.figures, name)
+            if figure in figures:
+                print(f"{path}: charts would overwrite {figure}; skipping them", file=sys.stderr)
+                figure = None
+            else:
+                figures.add(figure)
+        tasks.append((str(path), args.window, figure and str(figure), filler_words))
+    jobs = args.jobs or os.cpu_count() or 1
+    # Hand files out a few at a time so workers stay busy without long tails
+    chunksize = max(1, min(16, len(tasks) // (jobs * 4)))
+    failed = 0
+    sink = open_sink(args.out)
+    try:
+        with multiprocessing.Pool(jobs) as pool:
+            for done, (path, row, error) in enumerate(pool.imap_unordered(analyze_one, tasks, chunksize), 1):
+                if error is not None:
+                    failed += 1
+                    print(f"{path}: {error}", file=sys.stderr)
+                else:
+                    sink.write(row)
+                if not args.quiet:
+                    print(f"\r{done}/{len(tasks)} files", end='', file=sys.stderr, flush=True)
+    finally:
+        sink.close()
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Analyzed {len(tasks) - failed} of {len(tasks)} files into {args.out}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def bench(args):
+    from .bench import bench
+
+    return bench(args)
+
+
+def serve(args):
+    from .server import serve
+
+    return serve(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m fluency', description="Language fluency analysis.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch_parser = commands.add_parser('batch', help="analyze many transcript files in parallel")
+    batch_parser.add_argument('paths', nargs='+', help="transcript files or directories to search")
+    batch_parser.add_argument('--out', required=True, help="output file, .csv or .parquet")
+    batch_parser.add_argument('--jobs', '-j', type=int, default=0, help="worker processes (default: all cores)")
+    batch_parser.add_argument('--window', type=int, choices=ROLLING_WINDOWS, default=ROLLING_WINDOW,
+                              help="moving-average window in seconds for Max/Min WPM")
+    batch_parser.add_argument('--fillers', metavar='LEXICON',
+                              help="fillers to count: a language (en, de, es, fr) or a comma-separated list "
+                                   "such as 'uh,um,you know' (default: uh,um)")
+    batch_parser.add_argument('--figures', metavar='DIR',
+                              help="also render each file's charts as DIR/<path relative to the searched directory>.png")
+    batch_parser.add_argument('--quiet', '-q', action='store_true', help="no progress output")
+    batch_parser.set_defaults(func=batch)
+
+    bench_parser = commands.add_parser('bench', help="time each pipeline stage on synthetic transcripts")
+    bench_parser.add_argument('--minutes', type=float, nargs='+', default=[10, 60, 180, 600],
+                              help="transcript lengths to benchmark, in minutes")
+    bench_parser.add_argument('--density', type=float, default=20, help="segments per minute")
+    bench_parser.add_argument('--filler-rate', type=float, default=0.03, help="share of words that are fillers")
+    bench_parser.add_argument('--noise-rate', type=float, default=0.05,
+                              help="share of segments that are noise lines")
+    bench_parser.add_argument('--seed', type=int, default=0)
+    bench_parser.add_argument('--no-render', action='store_true', help="skip the word cloud and figure stages")
+    bench_parser.add_argument('--no-memory', action='store_true', help="skip the (slow) tracemalloc pass")
+    bench_parser.add_argument('--json', metavar='FILE', help="also write the results as JSON")
+    bench_parser.set_defaults(func=bench)
+
+    serve_parser = commands.add_parser('serve', help="serve a local HTTP JSON API")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--jobs', '-j', type=int, default=0, help="worker processes (default: all cores)")
+    serve_parser.add_argument('--max-body-mb', type=float, default=10, help="largest request body accepted")
+    serve_parser.add_argument('--max-batch', type=int, default=100, help="most transcripts per batch request")
+    serve_parser.add_argument('--max-pending', type=int, default=0,
+                              help="transcripts queued before new requests get 503 (default: 8 per worker)")
+    serve_parser.set_defaults(func=serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,55 @@
+"""Analysis of several transcripts side by side.
+
+Each transcript is analyzed on its own worker of an executor (a process
+pool in the app, since the analysis holds the GIL), so comparing N
+transcripts takes about as long as the slowest one rather than the sum.
+"""
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from . import ROLLING_WINDOW
+from .engine import analyze
+from .fillers import FILLER_WORDS
+
+# Error of a transcript whose worker process died
+WORKER_FAILED = "The analysis worker failed"
+
+
+def analyze_source(source, filler_words=FILLER_WORDS, window=ROLLING_WINDOW):
+    """Worker: analyze one transcript and return ``(result, error)``."""
+    try:
+        return analyze(source, filler_words, window=window), None
+    except Exception as e:
+        # One malformed upload must not take down the whole comparison
+        return None, str(e) or type(e).__name__
+
+
+def analyze_all(sources, executor, filler_words=FILLER_WORDS, window=ROLLING_WINDOW):
+    """Analyze every source concurrently on ``executor``; returns ``(result, error)`` pairs in order.
+
+    When a worker process dies (e.g. out of memory), the transcripts it
+    took down get the :data:`WORKER_FAILED` error; the executor is then
+    broken and the caller should replace it.
+    """
+    futures = []
+    for source in sources:
+        try:
+            futures.append(executor.submit(analyze_source, source, filler_words, window))
+        except BrokenProcessPool:
+            futures.append(None)
+    return [_outcome(future) for future in futures]
+
+
+def _outcome(future):
+    if future is None:
+        return None, WORKER_FAILED
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        return None, WORKER_FAILED
+
+
+def comparison_frame(labels, results):
+    """The summary numbers of each result, one row per transcript."""
+    return pd.DataFrame([{'Transcript': label, **result.summary()} for label, result in zip(labels, results)])
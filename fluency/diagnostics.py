@@ -0,0 +1,83 @@
+"""Opt-in per-stage timing, for finding out where a slow request spent its time.
+
+A :class:`Diagnostics` recorder is passed to the functions that support it
+(``analyze(..., diagnostics=...)``, ``figure_png(..., diagnostics=...)``),
+which wrap each stage in :func:`stage`. Every stage records its wall time,
+the change in allocated memory blocks, the number of garbage collections
+it triggered (a rough count of allocation churn) and the size of its
+input, and is logged as one JSON line on the ``fluency.diagnostics``
+logger. Without a recorder :func:`stage` does nothing, so the cost when
+diagnostics are off is one function call per stage.
+
+The allocation counters are process-wide, so stages that overlap with
+other threads' work include those threads' allocations too.
+"""
+import gc
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+
+def diagnostics_enabled():
+    """Whether ``FLUENCY_DIAGNOSTICS`` asks for diagnostics in every request."""
+    return os.environ.get('FLUENCY_DIAGNOSTICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def enable_logging(level=logging.INFO):
+    """Send diagnostics log lines to stderr unless the logger is already configured."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+def _collections():
+    return sum(generation['collections'] for generation in gc.get_stats())
+
+
+class Diagnostics:
+    """Collects one record per stage; ``context`` is added to every log line."""
+
+    def __init__(self, **context):
+        self.context = context
+        self.records = []
+        self._depth = 0
+
+    @contextmanager
+    def stage(self, name, size=None):
+        """Time the enclosed block as stage ``name``; ``size`` describes its input."""
+        record = {'stage': name, 'depth': self._depth, 'size': size}
+        # Records are kept in the order stages start, so nested stages follow their parent
+        self.records.append(record)
+        blocks = sys.getallocatedblocks()
+        collections = _collections()
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - started
+            record['blocks'] = sys.getallocatedblocks() - blocks
+            record['collections'] = _collections() - collections
+            self._depth -= 1
+            logger.info(json.dumps({**self.context, **record}))
+
+    def merge(self, other):
+        """Add the records of a recorder used in another thread, nested under the current stage."""
+        self.records.extend({**record, 'depth': record['depth'] + self._depth} for record in other.records)
+
+    def total_seconds(self):
+        return sum(record.get('seconds', 0.0) for record in self.records if record['depth'] == 0)
+
+
+def stage(diagnostics, name, size=None):
+    """``diagnostics.stage(name, size)``, or a no-op context when ``diagnostics`` is ``None``."""
+    if diagnostics is None:
+        return nullcontext()
+    return diagnostics.stage(name, size)
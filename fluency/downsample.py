@@ -0,0 +1,86 @@
+"""Reduce long series to a fixed point budget before they are drawn.
+
+A chart a thousand pixels wide cannot show more than a few thousand
+points, so plotting every segment of a long transcript only costs render
+time and image size. Both methods return the *indices* of the points to
+keep, always including the first and last, so several columns of a frame
+can be thinned consistently.
+
+- :func:`lttb_indices` (Largest-Triangle-Three-Buckets) keeps the points
+  that best preserve the visible shape of a line.
+- :func:`minmax_indices` keeps each bucket's minimum and maximum, so no
+  spike is lost; it is fully vectorized.
+"""
+import numpy as np
+
+# Points kept per line by default
+MAX_POINTS = 1000
+
+
+def lttb_indices(x, y, n=MAX_POINTS):
+    """Indices of ``n`` points of ``(x, y)`` chosen by Largest-Triangle-Three-Buckets.
+
+    ``x`` must be increasing and both arrays finite.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(x)
+    if size <= n or n < 3:
+        return np.arange(size)
+
+    # The first and last points are always kept; the rest is split into n - 2 buckets
+    edges = np.linspace(1, size - 1, n - 1).astype(np.intp)
+    indices = np.empty(n, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = size - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        # Third vertex: the average of the next bucket, or the last point
+        if i < n - 3:
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Keep the point forming the largest triangle with the previous pick and the next average
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n=MAX_POINTS):
+    """Indices of each bucket's minimum and maximum, about ``n`` points in total."""
+    y = np.asarray(y, dtype=float)
+    size = len(y)
+    if size <= n or n < 4:
+        return np.arange(size)
+    buckets = (n - 2) // 2
+    bucket = np.arange(size) * buckets // size
+    # Sorting by (bucket, value) puts each bucket's minimum first and its maximum last
+    order = np.lexsort((y, bucket))
+    bounds = np.flatnonzero(np.diff(bucket[order])) + 1
+    firsts = order[np.concatenate(([0], bounds))]
+    lasts = order[np.concatenate((bounds - 1, [size - 1]))]
+    return np.unique(np.concatenate(([0, size - 1], firsts, lasts)))
+
+
+def downsample(x, y, n=MAX_POINTS, method='lttb'):
+    """Return ``(x, y)`` thinned to at most about ``n`` points, dropping missing values first.
+
+    ``x`` may be datetimes; ``method`` is ``'lttb'`` or ``'minmax'``.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if method == 'lttb':
+        # Datetimes are compared as integer nanoseconds
+        positions = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+        indices = lttb_indices(positions, y, n)
+    elif method == 'minmax':
+        indices = minmax_indices(y, n)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}; expected 'lttb' or 'minmax'.")
+    return x[indices], y[indices]
@@ -0,0 +1,307 @@
+"""Headless transcript analysis.
+
+Everything the Streamlit page reports is computed here from the pasted
+transcript, so the same numbers can be produced in batch jobs and workers
+without importing streamlit or any of the plotting libraries.
+"""
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from . import ROLLING_WINDOW
+from .diagnostics import stage
+from .fillers import FILLER_WORDS, FillerMatcher
+from .levels import cefr_level_range
+from .formats import read_segments
+from .parsing import ParseStats
+from .tokenize import tokenize
+from .vocabulary import TokenEncoder, TokenTable
+
+# Timestamps are reported on the same datetime axis the charts use
+BASE_TIME = datetime(1900, 1, 1)
+
+BRACKETS_RE = re.compile(r'\[.*?\]|\(.*?\)')
+
+
+def clean_text(text):
+    # Remove words in square and round brackets, e.g. [Music] or (Laughter)
+    return BRACKETS_RE.sub('', text)
+
+
+def build_frame(segments, filler_words=FILLER_WORDS, window=ROLLING_WINDOW):
+    """Build the per-segment metrics DataFrame from :class:`~fluency.parsing.Segment` objects.
+
+    Only tokenization (:func:`encode_tokens`) runs per segment; every metric
+    is then computed over whole columns (:func:`metrics_frame`).
+    """
+    tokens, num_fillers = encode_tokens(segments, filler_words)
+    return metrics_frame(segments, tokens, num_fillers, window=window)
+
+
+def encode_tokens(segments, filler_words=FILLER_WORDS, filler_matches=None):
+    """Tokenize each segment's text once into a :class:`~fluency.vocabulary.TokenTable`.
+
+    Returns the table and the number of filler words per segment. Fillers,
+    including multi-word ones, are found in one pass over the whole token
+    stream, so a filler may span two segments; it is counted, as its number
+    of words, in the segment where it ends. Each match is appended to
+    ``filler_matches`` as ``(segment, filler, token position)`` when a list
+    is passed in.
+    """
+    matcher = FillerMatcher(filler_words)
+    scan = matcher.scanner()
+    encoder = TokenEncoder()
+    num_fillers = np.empty(len(segments), dtype=np.int64)
+    for i, segment in enumerate(segments):
+        tokens = tokenize(clean_text(segment.text))
+        encoder.add(tokens)
+        matches = scan(tokens)
+        num_fillers[i] = sum(length for _, _, length in matches)
+        if filler_matches is not None:
+            filler_matches.extend((i, matcher.fillers[index], start) for index, start, _ in matches)
+    return encoder.table(), num_fillers
+
+
+def metrics_frame(segments, tokens, num_fillers, window=ROLLING_WINDOW):
+    """Compute every per-segment metric from the token table as whole-column operations."""
+    n = len(segments)
+    starts = np.fromiter((segment.start for segment in segments), dtype=float, count=n)
+    ends = np.fromiter((np.nan if segment.end is None else segment.end for segment in segments), dtype=float, count=n)
+    return columns_frame(starts, ends, tokens.word_counts(), num_fillers, tokens.unique_word_counts(), window)
+
+
+def columns_frame(starts, ends, word_counts, num_fillers, num_unique_words, window=ROLLING_WINDOW):
+    """Build the metrics DataFrame from per-segment arrays; ``ends`` is NaN where unknown.
+
+    A segment's duration is its real end time when the source provides one
+    and the gap to the next segment otherwise.
+    """
+    # Duration: the real end time when known, else the gap to the next segment (0 for the last)
+    durations = np.where(np.isnan(ends), np.diff(starts, append=starts[-1:]), ends - starts)
+
+    # Keep plausible durations; long pauses and overlaps are replaced by one second per word
+    duration_clean = np.where((durations > 0) & (durations <= word_counts + 3), durations, word_counts)
+
+    cumulative_num_fillers = np.cumsum(num_fillers)
+    cumulative_num_words = np.cumsum(word_counts)
+    cumulative_duration_clean = np.cumsum(duration_clean)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pace = cumulative_num_words / cumulative_duration_clean * 60.0
+        fillers_share = cumulative_num_fillers / cumulative_num_words
+        rolling_avg_pace = rolling_pace(starts, word_counts, duration_clean, window)
+
+    return pd.DataFrame({
+        'time': pd.to_datetime(starts, unit='s', origin=BASE_TIME),
+        'num_words': word_counts,
+        'num_fillers': num_fillers,
+        'duration': durations,
+        'num_unique_words': num_unique_words,
+        'duration_clean': duration_clean,
+        'cumulative_num_fillers': cumulative_num_fillers,
+        'cumulative_num_words': cumulative_num_words,
+        'cumulative_duration_clean': cumulative_duration_clean,
+        'pace': pace,
+        'fillers_share': fillers_share,
+        'rolling_avg_pace': rolling_avg_pace,
+    })
+
+
+def rolling_pace(starts, word_counts, duration_clean, window):
+    """Words per minute over the trailing ``window`` seconds at each segment.
+
+    Each segment's window holds the segments that started within the last
+    ``window`` seconds; its bounds come from one ``searchsorted`` over the
+    start times and its sums from prefix sums, so the whole column is O(n).
+    Rows before a full window has elapsed are NaN.
+    """
+    words = np.concatenate(([0.0], np.cumsum(word_counts, dtype=float)))
+    seconds = np.concatenate(([0.0], np.cumsum(duration_clean, dtype=float)))
+    # Captions are normally in order; this keeps the search valid if a few are not
+    ordered = np.maximum.accumulate(starts)
+    first = np.searchsorted(ordered, ordered - window, side='right')
+    last = np.arange(1, len(starts) + 1)
+    pace = (words[last] - words[first]) / (seconds[last] - seconds[first]) * 60.0
+    pace[ordered - ordered[0] < window] = np.nan
+    return pace
+
+
+@dataclass
+class Result:
+    """Everything the app shows for one transcript."""
+    df: pd.DataFrame
+    total_duration: str
+    clean_duration: timedelta
+    clean_duration_minutes: int
+    num_unique_words: int
+    words_per_minute: float
+    max_pace: float
+    min_pace: float
+    percent_fillers: float
+    min_level: str
+    max_level: str
+    filler_words: list
+    rolling_window: int = ROLLING_WINDOW
+    parse_stats: ParseStats = None
+    tokens: TokenTable = None
+    filler_matches: list = None
+
+    @cached_property
+    def word_frequencies(self):
+        # Built on first use; only the word cloud and top words chart need it
+        return self.tokens.frequencies() if self.tokens is not None else {}
+
+    @property
+    def language_level_range(self):
+        # The language level range in the format "A2 - B1"
+        return f"{self.min_level} - {self.max_level}"
+
+    def info_data(self):
+        """The summary table shown under the charts, as ``Metric``/``Value`` columns."""
+        return {
+            "Metric": [
+                "Total Duration",
+                "Speaking Duration",
+                "Minutes",
+                "Unique Words",
+                "WPM",
+                "Level",
+                "Max WPM",
+                "Min WPM",
+                "Fillers Percentage",
+                "List of Fillers"
+            ],
+            "Value": [
+                self.total_duration,
+                self.clean_duration,
+                self.clean_duration_minutes,
+                self.num_unique_words,
+                f"{self.words_per_minute:.1f}",
+                self.language_level_range,
+                f"{self.max_pace:.1f}",
+                f"{self.min_pace:.1f}",
+                f"{self.percent_fillers:.2f}%",
+                ', '.join(self.filler_words)
+            ]
+        }
+
+    def info_df(self):
+        return pd.DataFrame(self.info_data()).T
+
+    def filler_breakdown(self):
+        """One row per filler in the lexicon: how often it was said and when first and last."""
+        rows = {' '.join(tokenize(filler)): [] for filler in self.filler_words}
+        for segment, filler, _ in self.filler_matches or ():
+            rows.setdefault(filler, []).append(segment)
+        times = self.df['time'].dt.strftime('%H:%M:%S')
+        total_words = max(int(self.df['num_words'].sum()), 1)
+        breakdown = pd.DataFrame({
+            "Filler": list(rows),
+            "Count": [len(segments) for segments in rows.values()],
+            "Share of Words": [
+                f"{len(segments) * len(filler.split()) / total_words:.2%}" for filler, segments in rows.items()
+            ],
+            "First": [times.iloc[segments[0]] if segments else "" for segments in rows.values()],
+            "Last": [times.iloc[segments[-1]] if segments else "" for segments in rows.values()],
+        })
+        return breakdown.sort_values("Count", ascending=False, kind="stable")
+
+    def summary(self):
+        """The summary table as one flat row of plain values, for CSV, Parquet or JSON.
+
+        Numbers are rounded like the table shows them; undefined ones (e.g.
+        Max WPM on a transcript shorter than the moving-average window) are ``None``.
+        """
+        return {
+            "Total Duration": self.total_duration.strip(),
+            "Speaking Duration": str(self.clean_duration),
+            "Minutes": self.clean_duration_minutes,
+            "Unique Words": self.num_unique_words,
+            "WPM": _rounded(self.words_per_minute, 1),
+            "Level": self.language_level_range,
+            "Max WPM": _rounded(self.max_pace, 1),
+            "Min WPM": _rounded(self.min_pace, 1),
+            "Fillers Percentage": _rounded(self.percent_fillers, 2),
+        }
+
+
+def _rounded(value, digits):
+    return None if math.isnan(value) or math.isinf(value) else round(value, digits)
+
+
+def summarize(df, filler_words=FILLER_WORDS, parse_stats=None, tokens=None, window=ROLLING_WINDOW,
+              filler_matches=None):
+    """Reduce a metrics DataFrame from :func:`build_frame` to a :class:`Result`."""
+    # Total duration, up to the end of the last segment when it is known
+    total_duration = df['time'].iloc[-1] - df['time'].iloc[0] + timedelta(seconds=round(df['duration'].iloc[-1]))
+    total_duration_str = str(total_duration)
+    if "days" in total_duration_str:
+        total_duration_str = total_duration_str.split("days")[1]  # Remove the "0 days" part
+
+    # Clean duration (no silence)
+    clean_duration_seconds = int(df['cumulative_duration_clean'].iloc[-1])
+    clean_duration = timedelta(seconds=clean_duration_seconds)
+    clean_duration_minutes = int(clean_duration_seconds/60.0)
+
+    # Number of unique words (vocabulary)
+    num_unique_words = int(df['num_unique_words'].iloc[-1])
+
+    # Words per minute (pace)
+    words_per_minute = float(df['pace'].iloc[-1])
+
+    # Percent of fillers in speech
+    percent_fillers = float(df['fillers_share'].iloc[-1] * 100)  # Convert to percentage
+
+    min_level, max_level = cefr_level_range(num_unique_words, clean_duration_minutes, words_per_minute)
+
+    return Result(
+        df=df,
+        total_duration=total_duration_str,
+        clean_duration=clean_duration,
+        clean_duration_minutes=clean_duration_minutes,
+        num_unique_words=num_unique_words,
+        words_per_minute=words_per_minute,
+        max_pace=float(df['rolling_avg_pace'].max()),
+        min_pace=float(df['rolling_avg_pace'].min()),
+        percent_fillers=percent_fillers,
+        min_level=min_level,
+        max_level=max_level,
+        filler_words=list(filler_words),
+        rolling_window=window,
+        parse_stats=parse_stats,
+        tokens=tokens,
+        filler_matches=filler_matches,
+    )
+
+
+def analyze(source, filler_words=FILLER_WORDS, fmt=None, window=ROLLING_WINDOW, diagnostics=None):
+    """Analyze a transcript and return a :class:`Result`.
+
+    ``source`` is pasted text, raw bytes or an open file in any format
+    understood by :mod:`fluency.formats`; ``fmt`` skips auto-detection.
+    ``window`` is the length in seconds of the moving average behind Max/Min WPM.
+    Each stage is timed when a :class:`~fluency.diagnostics.Diagnostics` is given.
+    Raises ``ValueError`` when no timed segments are found.
+    """
+    size = len(source) if isinstance(source, (str, bytes)) else None
+    with stage(diagnostics, 'parse', size):
+        segments, stats, _ = read_segments(source, fmt)
+    if not segments:
+        raise ValueError("No timestamped segments found in the transcript.")
+    filler_matches = []
+    with stage(diagnostics, 'tokenize', len(segments)):
+        tokens, num_fillers = encode_tokens(segments, filler_words, filler_matches)
+    with stage(diagnostics, 'metrics', len(segments)):
+        df = metrics_frame(segments, tokens, num_fillers, window=window)
+    with stage(diagnostics, 'levels', len(segments)):
+        return summarize(df, filler_words, stats, tokens, window, filler_matches)
+
+
+def analyze_file(path, filler_words=FILLER_WORDS, fmt=None, window=ROLLING_WINDOW):
+    """Analyze a transcript file on disk, streaming it line by line."""
+    with open(path, encoding='utf-8-sig') as fp:
+        return analyze(fp, filler_words, fmt, window)
@@ -0,0 +1,136 @@
+"""Filler lexicons and a single-pass matcher for single- and multi-word fillers.
+
+A lexicon is a list of fillers such as ``['uh', 'um', 'you know']``. Each
+entry is tokenized like the transcript, so matching is case-insensitive
+and works on whole words. :class:`FillerMatcher` compiles the lexicon
+into an Aho-Corasick automaton over tokens and finds every filler in one
+pass over the token stream, however many entries the lexicon has.
+"""
+import re
+from collections import deque
+
+from .tokenize import tokenize
+
+# Fillers counted when no lexicon is given
+FILLER_WORDS = ['uh', 'um']
+
+# Suggested lexicons per language; users can edit them in the app
+LEXICONS = {
+    'en': ['uh', 'um', 'er', 'erm', 'hmm', 'you know', 'i mean', 'kind of', 'sort of', 'you see'],
+    'de': ['äh', 'ähm', 'hm', 'also', 'halt', 'sozusagen', 'weißt du'],
+    'es': ['eh', 'em', 'este', 'pues', 'o sea', 'bueno', 'sabes'],
+    'fr': ['euh', 'ben', 'bah', 'genre', 'en fait', 'tu vois', 'du coup'],
+}
+
+LEXICON_SEPARATOR_RE = re.compile(r'[\n,;]+')
+
+
+def parse_lexicon(text):
+    """Split a user-edited lexicon (one filler per line or comma-separated) into a list of fillers."""
+    fillers = []
+    for entry in LEXICON_SEPARATOR_RE.split(text):
+        entry = ' '.join(tokenize(entry))
+        if entry and entry not in fillers:
+            fillers.append(entry)
+    return fillers
+
+
+class FillerMatcher:
+    """Aho-Corasick automaton whose alphabet is tokens rather than characters.
+
+    Overlapping fillers are resolved to the longest one ending at each
+    token that does not overlap a filler already counted, so every token
+    counts towards at most one filler.
+    """
+
+    def __init__(self, fillers):
+        self.fillers = []
+        # goto[state] maps a token to the next state; state 0 is the root
+        self.goto = [{}]
+        # For each state, the (length, filler index) of fillers ending there, longest first
+        self.outputs = [[]]
+        for filler in fillers:
+            tokens = tokenize(filler)
+            if not tokens or ' '.join(tokens) in self.fillers:
+                continue
+            state = 0
+            for token in tokens:
+                if token not in self.goto[state]:
+                    self.goto.append({})
+                    self.outputs.append([])
+                    self.goto[state][token] = len(self.goto) - 1
+                state = self.goto[state][token]
+            self.outputs[state].append((len(tokens), len(self.fillers)))
+            self.fillers.append(' '.join(tokens))
+        # Tokens outside every filler always lead back to the root
+        self.alphabet = frozenset(token for transitions in self.goto for token in transitions)
+
+        # Failure links, breadth first; each state also inherits the outputs of its failure state
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.outputs[child] = sorted(self.outputs[child] + self.outputs[self.fail[child]], reverse=True)
+
+    def scanner(self):
+        """Return a :class:`FillerScanner` for one token stream."""
+        return FillerScanner(self)
+
+    def find(self, tokens):
+        """Return ``(filler, start, length)`` for every filler in a list of tokens."""
+        return [(self.fillers[index], start, length) for index, start, length in self.scanner()(tokens)]
+
+
+class FillerScanner:
+    """Matching state over one token stream, fed one segment's tokens at a time.
+
+    Calling the scanner with the next tokens returns the ``(filler index,
+    start, length)`` of each filler they complete, with ``start`` counted
+    from the beginning of the stream. State is kept between calls, so
+    fillers are found across segment boundaries; :meth:`checkpoint` and
+    :meth:`restore` let a caller rewind it.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.state = self.position = self.counted_until = 0
+
+    def checkpoint(self):
+        return self.state, self.position, self.counted_until
+
+    def restore(self, checkpoint):
+        self.state, self.position, self.counted_until = checkpoint
+
+    def __call__(self, tokens):
+        matcher = self.matcher
+        goto, fail, outputs, alphabet = matcher.goto, matcher.fail, matcher.outputs, matcher.alphabet
+        matches = []
+        # Most segments contain no filler token at all
+        if alphabet.isdisjoint(tokens):
+            if tokens:
+                self.state = 0
+                self.position += len(tokens)
+            return matches
+        state, position, counted_until = self.checkpoint()
+        for token in tokens:
+            if token not in alphabet:
+                state = 0
+            else:
+                while state and token not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(token, 0)
+                for length, index in outputs[state]:
+                    start = position - length + 1
+                    if start >= counted_until:
+                        counted_until = position + 1
+                        matches.append((index, start, length))
+                        break
+            position += 1
+        self.restore((state, position, counted_until))
+        return matches
@@ -0,0 +1,184 @@
+"""Readers for caption files: SRT, WebVTT and YouTube ``json3`` exports.
+
+Every reader yields the same :class:`~fluency.parsing.Segment` objects as
+the paste parser, but with the real end time of each caption filled in.
+:func:`iter_file_segments` sniffs the format from the first lines of an
+open file and streams the rest, so large caption files never have to be
+held in memory as one string.
+"""
+import html
+import io
+import itertools
+import json
+import re
+
+from .parsing import BLANK, ORPHAN_TEXT, ParseStats, Segment, iter_segments
+
+YOUTUBE = 'youtube'
+SRT = 'srt'
+VTT = 'vtt'
+JSON3 = 'json3'
+FORMATS = (YOUTUBE, SRT, VTT, JSON3)
+
+# "00:00:01,000 --> 00:00:02,500" (SRT) or "00:01.000 --> 00:02.500 align:start" (VTT)
+CUE_TIMING_RE = re.compile(
+    r'^((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})'
+)
+# Inline markup such as <i>, <c.colorE5E5E5> or VTT karaoke timestamps <00:00:01.000>
+TAG_RE = re.compile(r'<[^>]*>')
+
+CUE_WITHOUT_TEXT = 'cue without text'
+
+# How many non-blank lines are buffered to tell the formats apart
+SNIFF_LINES = 3
+
+
+def detect_format(head):
+    """Guess the transcript format from its first few non-blank lines."""
+    head = head.lstrip('\ufeff \t\r\n')
+    if head.startswith('WEBVTT'):
+        return VTT
+    if head.startswith('{'):
+        return JSON3
+    for line in head.splitlines()[:SNIFF_LINES]:
+        if CUE_TIMING_RE.match(line.strip()):
+            return SRT
+    return YOUTUBE
+
+
+def parse_cue_time(value):
+    """Convert ``[hh:]mm:ss(.|,)mmm`` to seconds."""
+    parts = value.replace(',', '.').split(':')
+    seconds = float(parts[-1]) + int(parts[-2]) * 60
+    if len(parts) == 3:
+        seconds += int(parts[0]) * 3600
+    return seconds
+
+
+def clean_cue_text(lines):
+    return html.unescape(TAG_RE.sub('', ' '.join(lines))).strip()
+
+
+def iter_cues(lines, stats=None):
+    """Yield segments from SRT or WebVTT cue blocks.
+
+    Cue numbers, the ``WEBVTT`` header and ``NOTE``/``STYLE`` blocks are
+    skipped; multi-line cue text is joined with spaces.
+    """
+    if stats is None:
+        stats = ParseStats()
+    start = end = None
+    text = []
+
+    def flush():
+        if text:
+            stats.segments += 1
+            return Segment(start, clean_cue_text(text), end)
+        stats.skipped[CUE_WITHOUT_TEXT] += 1
+        return None
+
+    for line in lines:
+        stats.lines += 1
+        line = line.strip()
+        timing = CUE_TIMING_RE.match(line)
+        if timing:
+            if start is not None and (segment := flush()):
+                yield segment
+            start, end = parse_cue_time(timing.group(1)), parse_cue_time(timing.group(2))
+            text = []
+        elif not line:
+            if start is not None and (segment := flush()):
+                yield segment
+            start = None
+        elif start is not None:
+            text.append(line)
+        elif not line.isdigit():
+            # Header, NOTE or STYLE block; plain cue numbers are not worth reporting
+            stats.skipped[ORPHAN_TEXT] += 1
+    if start is not None and (segment := flush()):
+        yield segment
+
+
+def _json3_error(what):
+    return ValueError(f"Not a YouTube json3 export: {what}.")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def iter_json3(data, stats=None):
+    """Yield segments from a parsed YouTube ``json3`` caption export.
+
+    Raises ``ValueError`` when the data does not have the json3 structure.
+    """
+    if stats is None:
+        stats = ParseStats()
+    if not isinstance(data, dict) or not isinstance(data.get('events', []), list):
+        raise _json3_error("expected an object with an 'events' list")
+    for event in data.get('events', []):
+        stats.lines += 1
+        if not isinstance(event, dict):
+            raise _json3_error("every event must be an object")
+        segs = event.get('segs') or ()
+        if not isinstance(segs, list) or not all(isinstance(seg, dict) and isinstance(seg.get('utf8', ''), str)
+                                                 for seg in segs):
+            raise _json3_error("'segs' must be a list of objects with 'utf8' text")
+        text = ''.join(seg.get('utf8', '') for seg in segs)
+        text = ' '.join(text.split())
+        if not text or 'tStartMs' not in event:
+            stats.skipped[BLANK] += 1
+            continue
+        if not _is_number(event['tStartMs']) or not _is_number(event.get('dDurationMs', 0)):
+            raise _json3_error("'tStartMs' and 'dDurationMs' must be numbers")
+        start = event['tStartMs'] / 1000.0
+        end = start + event['dDurationMs'] / 1000.0 if 'dDurationMs' in event else None
+        stats.segments += 1
+        yield Segment(start, text, end)
+
+
+def sniff_format(fp):
+    """Detect the format of an open text file.
+
+    Returns the format and an iterator that still yields every line of the
+    file, including the ones read to make the guess.
+    """
+    head = []
+    for line in fp:
+        head.append(line)
+        if sum(1 for h in head if h.strip()) >= SNIFF_LINES:
+            break
+    return detect_format(''.join(head)), itertools.chain(head, fp)
+
+
+def iter_file_segments(fp, fmt=None, stats=None):
+    """Stream segments from an open text file, detecting its format if needed."""
+    if stats is None:
+        stats = ParseStats()
+    if fmt is None:
+        fmt, fp = sniff_format(fp)
+    if fmt == JSON3:
+        return iter_json3(json.loads(''.join(fp)), stats)
+    if fmt in (SRT, VTT):
+        return iter_cues(fp, stats)
+    if fmt == YOUTUBE:
+        return iter_segments(fp, stats)
+    raise ValueError(f"Unknown transcript format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+
+
+def read_segments(source, fmt=None):
+    """Read all segments from text, bytes or a binary/text file object.
+
+    Returns the list of segments, the :class:`ParseStats` and the format used.
+    """
+    if isinstance(source, bytes):
+        source = source.decode('utf-8-sig')
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    elif not isinstance(source, io.TextIOBase):
+        source = io.TextIOWrapper(source, encoding='utf-8-sig')
+    if fmt is None:
+        fmt, source = sniff_format(source)
+    stats = ParseStats()
+    segments = list(iter_file_segments(source, fmt, stats))
+    return segments, stats, fmt
@@ -0,0 +1,154 @@
+"""Per-user history of analyzed sessions, for tracking progress over time.
+
+Each saved analysis becomes one row in a SQLite ``sessions`` table with
+its summary metrics and a downsampled copy of its pace, vocabulary and
+filler-share curves. The progress view only ever reads these rows, which
+are indexed by user and date (and level), so it stays fast with hundreds
+of sessions and never re-analyzes a transcript.
+
+Only numbers are stored, never the transcript text.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Points kept per curve in a saved session
+SERIES_POINTS = 200
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    created REAL NOT NULL,
+    key TEXT NOT NULL,
+    min_level TEXT NOT NULL,
+    max_level TEXT NOT NULL,
+    minutes REAL NOT NULL,
+    unique_words INTEGER NOT NULL,
+    wpm REAL,
+    unique_words_per_minute REAL,
+    fillers_percentage REAL,
+    max_wpm REAL,
+    min_wpm REAL,
+    series TEXT NOT NULL,
+    UNIQUE (user, key)
+);
+CREATE INDEX IF NOT EXISTS sessions_user_created ON sessions (user, created);
+CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created);
+CREATE INDEX IF NOT EXISTS sessions_level ON sessions (max_level, min_level);
+'''
+
+# Columns returned by HistoryStore.sessions, in order
+SUMMARY_COLUMNS = (
+    'id', 'created', 'min_level', 'max_level', 'minutes', 'unique_words', 'wpm',
+    'unique_words_per_minute', 'fillers_percentage', 'max_wpm', 'min_wpm',
+)
+
+SERIES_COLUMNS = ('pace', 'num_unique_words', 'fillers_share')
+
+
+def _number(value):
+    # NaN (e.g. Max WPM on a transcript shorter than the window, or every metric
+    # of a transcript without countable words) is stored as NULL
+    return None if value != value else float(value)
+
+
+def result_series(result, max_points=SERIES_POINTS):
+    """The result's curves, downsampled, as ``{column: [[seconds, value], ...]}``."""
+    # Imported here: the app imports this module up front, before numpy is needed
+    from .downsample import downsample
+
+    df = result.df
+    seconds = (df['time'] - df['time'].iloc[0]).dt.total_seconds().to_numpy()
+    series = {}
+    for column in SERIES_COLUMNS:
+        x, y = downsample(seconds, df[column].to_numpy(), max_points)
+        series[column] = [[round(float(t), 1), _number(round(float(v), 4))] for t, v in zip(x, y)]
+    return series
+
+
+class HistoryStore:
+    """SQLite-backed session history; safe to share between threads and processes."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, user, key, result, created=None):
+        """Save ``result`` for ``user``; saving the same transcript again only updates its date."""
+        minutes = result.clean_duration.total_seconds() / 60
+        row = (
+            user, time.time() if created is None else created, key, result.min_level, result.max_level,
+            minutes, result.num_unique_words, _number(result.words_per_minute),
+            result.num_unique_words / minutes if minutes else None, _number(result.percent_fillers),
+            _number(result.max_pace), _number(result.min_pace), json.dumps(result_series(result)),
+        )
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO sessions (user, created, key, min_level, max_level, minutes, unique_words, wpm, '
+                'unique_words_per_minute, fillers_percentage, max_wpm, min_wpm, series) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (user, key) DO UPDATE SET created = excluded.created',
+                row
+            )
+
+    def sessions(self, user, since=None, until=None, level=None, limit=None):
+        """Summary rows of ``user``'s sessions, oldest first, as dicts.
+
+        ``since`` and ``until`` are Unix times; ``level`` keeps sessions whose
+        upper level is ``level``. Curves are not loaded; see :meth:`series`.
+        """
+        query = f'SELECT {", ".join(SUMMARY_COLUMNS)} FROM sessions WHERE user = ?'
+        params = [user]
+        if since is not None:
+            query += ' AND created >= ?'
+            params.append(since)
+        if until is not None:
+            query += ' AND created < ?'
+            params.append(until)
+        if level is not None:
+            query += ' AND max_level = ?'
+            params.append(level)
+        if limit is not None:
+            # The most recent sessions, still returned oldest first
+            query = f'SELECT * FROM ({query} ORDER BY created DESC LIMIT ?) ORDER BY created'
+            params.append(limit)
+        else:
+            query += ' ORDER BY created'
+        with self._connect() as conn:
+            return [dict(zip(SUMMARY_COLUMNS, row)) for row in conn.execute(query, params)]
+
+    def series(self, session_id):
+        """The downsampled curves saved with a session, or ``None``."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT series FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def delete(self, user, session_id=None):
+        """Delete one of ``user``'s sessions, or all of them."""
+        with self._connect() as conn:
+            if session_id is None:
+                conn.execute('DELETE FROM sessions WHERE user = ?', (user,))
+            else:
+                conn.execute('DELETE FROM sessions WHERE user = ? AND id = ?', (user, session_id))
+
+
+def open_history(path=None):
+    """Open the history configured by ``FLUENCY_HISTORY``, or return ``None`` if unset."""
+    path = path or os.environ.get('FLUENCY_HISTORY')
+    if not path:
+        return None
+    return HistoryStore(path)
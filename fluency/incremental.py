@@ -0,0 +1,130 @@
+"""Incremental analysis of a transcript that grows by appended text.
+
+Live practice sessions paste their transcript in growing pieces.
+:class:`IncrementalAnalyzer` keeps the parser state, the token table, the
+filler scanner and the per-segment counts between calls. When the new
+text extends the previous one, only the appended lines are parsed and
+tokenized; the metric columns are then rebuilt from the stored counts
+with a few vectorized operations. Any other text, such as an edit in the
+middle or a caption file format (detected again while the text is still
+short), is analyzed from scratch.
+
+The last line of a text that does not end with a newline may be cut off
+mid-word, so it is always parsed again on the next update.
+"""
+import io
+from array import array
+
+import numpy as np
+
+from . import ROLLING_WINDOW
+from .diagnostics import stage
+from .engine import analyze, clean_text, columns_frame, summarize
+from .fillers import FILLER_WORDS, FillerMatcher
+from .formats import YOUTUBE, detect_format
+from .parsing import SegmentParser
+from .tokenize import tokenize
+from .vocabulary import TokenEncoder
+
+# Characters of a new text looked at to tell pasted transcripts from caption files
+FORMAT_HEAD = 4096
+
+
+class IncrementalAnalyzer:
+    """Analyzes successive versions of a pasted transcript, reusing the work done on earlier ones."""
+
+    def __init__(self, filler_words=FILLER_WORDS, window=ROLLING_WINDOW):
+        self.filler_words = list(filler_words)
+        self.window = window
+        self.matcher = FillerMatcher(self.filler_words)
+        self.reset()
+
+    def reset(self):
+        self.text = ''
+        # Offset in text up to which lines are complete and parsed for good
+        self.stable = 0
+        self.parser = SegmentParser()
+        self.encoder = TokenEncoder()
+        self.scanner = self.matcher.scanner()
+        self.starts = array('d')
+        self.num_fillers = array('q')
+        self.filler_matches = []
+        self.checkpoint = None
+
+    def save_checkpoint(self):
+        self.checkpoint = (
+            self.parser.copy(), len(self.starts), self.scanner.checkpoint(), len(self.filler_matches)
+        )
+
+    def rollback(self):
+        """Undo the segments parsed from the last, possibly incomplete, line."""
+        parser, segments, scanner, matches = self.checkpoint
+        self.parser = parser.copy()
+        self.encoder.truncate(segments)
+        del self.starts[segments:]
+        del self.num_fillers[segments:]
+        self.scanner.restore(scanner)
+        del self.filler_matches[matches:]
+
+    def add_segments(self, segments):
+        encoder, scan, fillers = self.encoder, self.scanner, self.matcher.fillers
+        for segment in segments:
+            i = len(self.starts)
+            tokens = tokenize(clean_text(segment.text))
+            encoder.add(tokens)
+            matches = scan(tokens)
+            self.starts.append(segment.start)
+            self.num_fillers.append(sum(length for _, _, length in matches))
+            self.filler_matches.extend((i, fillers[index], start) for index, start, _ in matches)
+
+    def update(self, text, diagnostics=None):
+        """Analyze the current ``text`` and return a :class:`~fluency.engine.Result`.
+
+        Raises ``ValueError`` when no timed segments are found.
+        """
+        extends = self.text and text.startswith(self.text)
+        # A short previous text may have been too little to tell the format
+        # ("1\n" begins an SRT file too), so look again until it covered the head
+        if not extends or len(self.text) < FORMAT_HEAD:
+            if detect_format(text[:FORMAT_HEAD]) != YOUTUBE:
+                self.reset()
+                return analyze(text, self.filler_words, window=self.window, diagnostics=diagnostics)
+        if extends:
+            self.rollback()
+        else:
+            self.reset()
+
+        new = text[self.stable:]
+        # Split like a full analysis reads the text, at "\n" only: "\r" and other
+        # line separators stay inside a line, and a "\r\n" cut in half is incomplete
+        lines = io.StringIO(new).readlines()
+        partial = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+        feed = self.parser.feed
+        with stage(diagnostics, 'parse', len(new)):
+            complete = [segment for line in lines if (segment := feed(line)) is not None]
+        with stage(diagnostics, 'tokenize', len(complete)):
+            self.add_segments(complete)
+        self.save_checkpoint()
+        if partial and (segment := feed(partial)) is not None:
+            self.add_segments([segment])
+        self.stable = len(text) - len(partial)
+        self.text = text
+
+        if not self.starts:
+            raise ValueError("No timestamped segments found in the transcript.")
+        with stage(diagnostics, 'metrics', len(self.starts)):
+            df = columns_frame(
+                np.array(self.starts, dtype=float),
+                np.full(len(self.starts), np.nan),
+                np.diff(np.array(self.encoder.offsets, dtype=np.int64)),
+                np.array(self.num_fillers, dtype=np.int64),
+                np.array(self.encoder.sizes, dtype=np.int64),
+                self.window,
+            )
+        with stage(diagnostics, 'levels', len(self.starts)):
+            # The stats of a finished parse count a trailing timestamp that has no text yet
+            parser = self.parser.copy()
+            parser.finish()
+            return summarize(
+                df, self.filler_words, parser.stats, self.encoder.table(), self.window, list(self.filler_matches)
+            )
@@ -0,0 +1,167 @@
+"""CEFR reference data and level classification.
+
+The thresholds below are the same ones drawn as reference lines on the
+charts: a WPM threshold per level and a vocabulary-vs-minutes curve for a
+native English teacher, scaled per level.
+"""
+import numpy as np
+
+# Average speaking pace per level, drawn as horizontal reference lines
+wpm_data = {
+    "CEFR Level": ["A1", "A2", "B1", "B2", "C1", "C2", "Rap God"],
+    "Average WPM": [30, 50, 75, 105, 135, 165, 257]
+}
+
+# Define CEFR levels for words per minute (WPM)
+wpm_levels = {
+    "A1": 30,
+    "A2": 50,
+    "B1": 75,
+    "B2": 105,
+    "C1": 135,
+    "C2": 165
+}
+
+# Data for the native English teacher
+teacher_data_minutes = np.array([0, 5, 10, 15, 20, 30, 60, 120, 180])
+teacher_data_words = np.array([0, 318, 500, 638, 767, 1000, 1450, 2250, 2800])
+
+
+def cubic_spline(x, y):
+    """Return a vectorized not-a-knot cubic spline through ``(x, y)``.
+
+    Inside the data range this is the same curve as scipy's
+    ``interp1d(x, y, kind='cubic')``; past the last point it continues in a
+    straight line along the end slope instead of raising.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    h = np.diff(x)
+    slopes = np.diff(y) / h
+
+    # Solve for the second derivatives: continuity at interior knots, and a
+    # continuous third derivative across the second and second-to-last knots
+    system = np.zeros((n, n))
+    rhs = np.zeros(n)
+    for i in range(1, n - 1):
+        system[i, i - 1:i + 2] = h[i - 1], 2 * (h[i - 1] + h[i]), h[i]
+        rhs[i] = 6 * (slopes[i] - slopes[i - 1])
+    system[0, :3] = h[1], -(h[0] + h[1]), h[0]
+    system[-1, -3:] = h[-1], -(h[-2] + h[-1]), h[-2]
+    second = np.linalg.solve(system, rhs)
+
+    # Per-interval polynomial coefficients in powers of (t - x[i])
+    c1 = slopes - h * (2 * second[:-1] + second[1:]) / 6
+    c2 = second[:-1] / 2
+    c3 = (second[1:] - second[:-1]) / (6 * h)
+    end_slope = c1[-1] + 2 * c2[-1] * h[-1] + 3 * c3[-1] * h[-1] ** 2
+
+    def evaluate(t):
+        t = np.asarray(t, dtype=float)
+        i = np.clip(np.searchsorted(x, t, side='right') - 1, 0, n - 2)
+        dt = np.minimum(t, x[-1]) - x[i]
+        value = y[i] + dt * (c1[i] + dt * (c2[i] + dt * c3[i]))
+        return value + np.maximum(t - x[-1], 0) * end_slope
+
+    return evaluate
+
+
+# Create an interpolation function based on the teacher's data
+interpolate_teacher = cubic_spline(teacher_data_minutes, teacher_data_words)
+
+# Define scaling factors for each CEFR level based on expected differences
+scaling_factors = {
+    "A1": 0.2,
+    "A2": 0.3,
+    "B1": 0.4,
+    "B2": 0.6,
+    "C1": 0.8,
+    "C2": 1.0,
+    "Rap God": 2.0,
+}
+
+
+# Everything classification needs, precomputed once at import time.
+# Level names in order; indices into LEVELS are what the classifiers return
+LEVELS = np.array(["A1", "A2", "B1", "B2", "C1", "C2", "Native"])
+NATIVE = len(LEVELS) - 1
+C2 = NATIVE - 1
+# Vocabulary curve multipliers (A1 .. Rap God) and WPM thresholds (A1 .. C2), ascending
+VOCAB_SCALES = np.array(list(scaling_factors.values()), dtype=float)
+WPM_THRESHOLDS = np.array(list(wpm_levels.values()), dtype=float)
+
+# Reference curves drawn on the vocabulary chart: one row per level in scaling_factors
+REFERENCE_MINUTES = np.linspace(0, 180, 100)
+REFERENCE_WORDS = np.outer(VOCAB_SCALES, interpolate_teacher(REFERENCE_MINUTES))
+
+
+def _max_index(count_below):
+    # The first threshold the value does not exceed; past the last one is Native
+    return np.minimum(count_below, NATIVE)
+
+
+def _min_index(count_reached):
+    # The last threshold the value reaches; below the first is still A1, past C2 stays C2
+    return np.clip(count_reached - 1, 0, C2)
+
+
+def vocab_level_indices(num_unique_words, duration_minutes):
+    """Classify vocabulary size against the scaled teacher curves.
+
+    Returns ``(min_index, max_index)`` arrays into :data:`LEVELS`. The curve
+    for every level is the same teacher curve times a constant, so comparing
+    the ratio of vocabulary to the teacher's with :data:`VOCAB_SCALES` finds
+    the level with a single ``searchsorted``.
+    """
+    words = np.asarray(num_unique_words, dtype=float)
+    teacher = interpolate_teacher(duration_minutes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(teacher > 0, words / teacher, np.where(words > 0, np.inf, 0.0))
+    return (_min_index(np.searchsorted(VOCAB_SCALES, ratio, side='right')),
+            _max_index(np.searchsorted(VOCAB_SCALES, ratio, side='left')))
+
+
+def vocab_growth_level_indices(new_words, start_minutes, end_minutes):
+    """Classify vocabulary growth between two points of speaking time.
+
+    ``new_words`` unique words first used between ``start_minutes`` and
+    ``end_minutes`` are compared with how much the teacher curve grows over
+    the same stretch, so a window late in a long talk is not penalized for
+    the words already used before it.
+    """
+    words = np.asarray(new_words, dtype=float)
+    teacher = interpolate_teacher(end_minutes) - interpolate_teacher(start_minutes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(teacher > 0, words / teacher, np.where(words > 0, np.inf, 0.0))
+    return (_min_index(np.searchsorted(VOCAB_SCALES, ratio, side='right')),
+            _max_index(np.searchsorted(VOCAB_SCALES, ratio, side='left')))
+
+
+def wpm_level_indices(words_per_minute):
+    """Classify speaking pace against :data:`WPM_THRESHOLDS`; see :func:`vocab_level_indices`."""
+    wpm = np.asarray(words_per_minute, dtype=float)
+    return (_min_index(np.searchsorted(WPM_THRESHOLDS, wpm, side='right')),
+            _max_index(np.searchsorted(WPM_THRESHOLDS, wpm, side='left')))
+
+
+def level_range_indices(num_unique_words, duration_minutes, words_per_minute):
+    """Vectorized level range: ``(min_index, max_index)`` arrays into :data:`LEVELS`.
+
+    The lower bound is the lower of the vocabulary and pace minimums, the
+    upper bound the higher of their maximums; all arguments broadcast. A NaN
+    pace (no speaking time) is no evidence, and the vocabulary alone decides.
+    """
+    vocab_min, vocab_max = vocab_level_indices(num_unique_words, duration_minutes)
+    wpm = np.asarray(words_per_minute, dtype=float)
+    wpm_min, wpm_max = wpm_level_indices(wpm)
+    # searchsorted puts NaN past every threshold, which would widen the range to Native
+    unknown = np.isnan(wpm)
+    return (np.where(unknown, vocab_min, np.minimum(vocab_min, wpm_min)),
+            np.where(unknown, vocab_max, np.maximum(vocab_max, wpm_max)))
+
+
+def cefr_level_range(num_unique_words, duration_minutes, words_per_minute):
+    """Return the ``(min_level, max_level)`` pair of level names for one transcript."""
+    min_index, max_index = level_range_indices(num_unique_words, duration_minutes, words_per_minute)
+    return str(LEVELS[min_index]), str(LEVELS[max_index])
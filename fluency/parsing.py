@@ -0,0 +1,132 @@
+"""Single-pass parser for the "timestamp line / text line" transcript layout.
+
+YouTube's "Show transcript" panel copies as alternating lines::
+
+    0:12
+    So in college,
+    0:15
+    I was a government major,
+
+Real pastes also contain blank lines, chapter headers and timestamps whose
+text got lost. :func:`iter_segments` walks the lines once, pairs every
+timestamp with the text line that follows it and counts everything it has
+to skip, so long and noisy transcripts parse in linear time.
+"""
+import io
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+# "m:ss", "mm:ss" or "h:mm:ss" (hours may exceed 24 on very long recordings)
+TIMESTAMP_RE = re.compile(r'^(\d+):(\d{1,2})(?::(\d{1,2}))?$')
+
+# Reasons a line can be skipped
+BLANK = 'blank'
+ORPHAN_TEXT = 'text without timestamp'
+ORPHAN_TIMESTAMP = 'timestamp without text'
+
+
+class Segment(NamedTuple):
+    """One caption: start time in seconds, its text and, when known, its end."""
+    start: float
+    text: str
+    end: Optional[float] = None
+
+
+@dataclass
+class ParseStats:
+    """Counts collected while parsing; filled in as the generator is consumed."""
+    lines: int = 0
+    segments: int = 0
+    skipped: Counter = field(default_factory=Counter)
+
+    @property
+    def total_skipped(self):
+        return sum(self.skipped.values())
+
+    def copy(self):
+        return ParseStats(self.lines, self.segments, Counter(self.skipped))
+
+
+def parse_timestamp(line):
+    """Return the number of seconds in a timestamp line, or ``None``."""
+    match = TIMESTAMP_RE.match(line)
+    if match is None:
+        return None
+    first, second, third = match.groups()
+    if third is None:
+        return int(first) * 60 + int(second)
+    return int(first) * 3600 + int(second) * 60 + int(third)
+
+
+class SegmentParser:
+    """The line-by-line state machine behind :func:`iter_segments`.
+
+    Keeping it as an object lets a caller stop after any line, copy the
+    state and resume parsing when more text is appended.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = ParseStats() if stats is None else stats
+        # Start time of a timestamp line still waiting for its text
+        self.pending = None
+
+    def feed(self, line):
+        """Consume one line; return the :class:`Segment` it completes, if any."""
+        stats = self.stats
+        stats.lines += 1
+        line = line.strip()
+        if not line:
+            stats.skipped[BLANK] += 1
+            return None
+        seconds = parse_timestamp(line)
+        if seconds is not None:
+            if self.pending is not None:
+                stats.skipped[ORPHAN_TIMESTAMP] += 1
+            self.pending = seconds
+            return None
+        if self.pending is not None:
+            stats.segments += 1
+            segment = Segment(self.pending, line)
+            self.pending = None
+            return segment
+        stats.skipped[ORPHAN_TEXT] += 1
+        return None
+
+    def finish(self):
+        """Count a trailing timestamp without text; call once the input has ended."""
+        if self.pending is not None:
+            self.stats.skipped[ORPHAN_TIMESTAMP] += 1
+            self.pending = None
+
+    def copy(self):
+        parser = SegmentParser(self.stats.copy())
+        parser.pending = self.pending
+        return parser
+
+
+def iter_segments(lines, stats=None):
+    """Yield a :class:`Segment` for every timestamp followed by a text line.
+
+    ``lines`` may be any iterable of strings, e.g. an open file. A timestamp
+    directly followed by another timestamp is dropped in favour of the later
+    one; text that does not follow a timestamp is dropped.
+    """
+    parser = SegmentParser(stats)
+    feed = parser.feed
+    for line in lines:
+        segment = feed(line)
+        if segment is not None:
+            yield segment
+    parser.finish()
+
+
+def parse_transcript(text):
+    """Parse pasted text into a list of segments and the :class:`ParseStats`.
+
+    Lines end at ``\n`` only, as when the text is read as a file.
+    """
+    stats = ParseStats()
+    segments = list(iter_segments(io.StringIO(text), stats))
+    return segments, stats
@@ -0,0 +1,322 @@
+"""Chart rendering: the 2x2 figure, its panels on their own, and the word cloud.
+
+This is the only module that imports matplotlib, seaborn and wordcloud;
+import it lazily so the page can render before those are loaded. Figures
+are built with the object-oriented API and never touch pyplot's global
+figure registry, so a long-running server does not accumulate them.
+"""
+import heapq
+import io
+import math
+import os
+import threading
+from operator import itemgetter
+
+import matplotlib.dates as mdates
+import numpy as np
+import seaborn as sns
+from matplotlib import font_manager, rcParams
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from wordcloud import STOPWORDS, WordCloud
+
+from .diagnostics import stage
+from .downsample import MAX_POINTS, downsample
+from .engine import BASE_TIME
+from .levels import LEVELS, REFERENCE_MINUTES, REFERENCE_WORDS, scaling_factors, wpm_data
+
+# Panels of the chart grid, also renderable one at a time with chart_png
+PACE = 'pace'
+VOCABULARY = 'vocabulary'
+FILLERS = 'fillers'
+WORDCLOUD = 'wordcloud'
+CHARTS = (PACE, VOCABULARY, FILLERS, WORDCLOUD)
+# Bar chart of the most frequent words, a cheaper stand-in for the word cloud
+TOP_WORDS = 'top words'
+
+# Size of the 2x2 chart grid, of a single panel and of the level timeline in inches
+FIGURE_SIZE = (20, 16)
+CHART_SIZE = (10, 8)
+TIMELINE_SIZE = (20, 4)
+# Output resolution; lowered automatically if the canvas would exceed MAX_PIXELS
+FIGURE_DPI = int(os.environ.get('FLUENCY_FIGURE_DPI', 150))
+# Largest canvas a single render may allocate (RGBA, so 4 bytes per pixel)
+MAX_PIXELS = int(os.environ.get('FLUENCY_MAX_PIXELS', 12_000_000))
+# Longest side of a canvas in pixels, far below Agg's hard limit of 2**23
+MAX_SIDE = 2 ** 15
+
+# Word cloud canvas in pixels, the cheap preview size, and how many words it lays out
+WORDCLOUD_SIZE = (1200, 900)
+PREVIEW_SIZE = (480, 360)
+WORDCLOUD_WORDS = 200
+# Bars in the top words chart
+TOP_WORDS_BARS = 30
+
+# Seaborn's style contexts swap matplotlib's process-wide rcParams, so figures
+# are drawn one at a time even when several threads render concurrently
+STYLE_LOCK = threading.RLock()
+
+
+def top_words(frequencies, n=WORDCLOUD_WORDS):
+    """Return the ``n`` most frequent words as ``(word, count)`` pairs, stopwords and numbers excluded."""
+    # Drop the stopwords and numbers WordCloud.generate would drop
+    return heapq.nlargest(
+        n,
+        ((word, count) for word, count in frequencies.items() if word not in STOPWORDS and not word.isdigit()),
+        key=itemgetter(1),
+    )
+
+
+def wordcloud_image(frequencies, size=WORDCLOUD_SIZE, max_words=WORDCLOUD_WORDS):
+    """Render a word frequency table to an RGB array, or ``None`` if nothing is left to draw.
+
+    Only the ``max_words`` most frequent words are laid out; the layout time
+    grows with the canvas ``size`` in pixels, so a :data:`PREVIEW_SIZE` cloud
+    is several times cheaper than a full one.
+    """
+    cloud_frequencies = dict(top_words(frequencies, max_words))
+    if not cloud_frequencies:
+        return None
+    width, height = size
+    return WordCloud(
+        width=width, height=height, max_words=max_words, background_color='white'
+    ).generate_from_frequencies(cloud_frequencies).to_array()
+
+
+def fit_dpi(figsize, dpi, max_pixels=MAX_PIXELS):
+    """Lower ``dpi`` as needed so a ``figsize`` canvas stays within ``max_pixels``, and each side within MAX_SIDE."""
+    width, height = figsize
+    return min(dpi, math.sqrt(max_pixels / (width * height)), MAX_SIDE / max(width, height))
+
+
+def save_png(fig, dpi=FIGURE_DPI, max_pixels=MAX_PIXELS, diagnostics=None):
+    """Lay out ``fig`` and encode it as PNG bytes within the pixel budget."""
+    with stage(diagnostics, 'layout'):
+        # Adjust layout to avoid overlap
+        fig.tight_layout()
+        # savefig(bbox_inches='tight') sizes the canvas to everything drawn, which can reach
+        # far outside the figure, so the budget applies to that box rather than to figsize
+        bbox = fig.get_tightbbox()
+        pad = 2 * rcParams['savefig.pad_inches']
+        figsize = (bbox.width + pad, bbox.height + pad)
+
+    dpi = fit_dpi(figsize, dpi, max_pixels)
+    with stage(diagnostics, 'encode', int(figsize[0] * figsize[1] * dpi * dpi)):
+        png = io.BytesIO()
+        fig.savefig(png, format='png', bbox_inches='tight', dpi=dpi)
+        return png.getvalue()
+
+
+def figure_png(result, wordcloud=None, figsize=FIGURE_SIZE, dpi=FIGURE_DPI, max_pixels=MAX_PIXELS,
+               diagnostics=None):
+    """Draw the 2x2 chart grid and return it as PNG bytes.
+
+    ``wordcloud`` is the image from :func:`wordcloud_image`, drawn in the
+    bottom right panel when given. The figure is a standalone
+    :class:`~matplotlib.figure.Figure`, never registered with pyplot, and is
+    cleared as soon as the PNG is written; its raster canvas, the bulk of
+    the memory a render needs, is capped at ``max_pixels``. Drawing, layout
+    and PNG encoding are timed separately when ``diagnostics`` is given.
+    """
+    # Seaborn's darkgrid theme, applied to this figure only instead of the global rcParams
+    with STYLE_LOCK, sns.axes_style("darkgrid"), sns.plotting_context("notebook"):
+        fig = Figure(figsize=figsize)
+        try:
+            with stage(diagnostics, 'draw', len(result.df)):
+                # Create a 2x2 grid for the plots
+                axes = fig.subplots(2, 2)
+                draw_charts(axes, result.df, wordcloud, result.rolling_window)
+            return save_png(fig, dpi, max_pixels, diagnostics)
+        finally:
+            fig.clear()
+
+
+def chart_png(result, chart, wordcloud=None, figsize=CHART_SIZE, dpi=FIGURE_DPI, max_pixels=MAX_PIXELS,
+              diagnostics=None):
+    """Draw one panel of the chart grid on its own figure and return it as PNG bytes.
+
+    ``chart`` is one of :data:`CHARTS` or :data:`TOP_WORDS`; ``wordcloud``
+    is only used by the word cloud panel. Lets a caller render and show the panels independently.
+    """
+    with STYLE_LOCK, sns.axes_style("darkgrid"), sns.plotting_context("notebook"):
+        fig = Figure(figsize=figsize)
+        try:
+            with stage(diagnostics, 'draw', len(result.df)):
+                ax = fig.subplots()
+                if chart == PACE:
+                    draw_pace(ax, result.df, result.rolling_window)
+                elif chart == VOCABULARY:
+                    draw_vocabulary(ax, result.df)
+                elif chart == FILLERS:
+                    draw_fillers(ax, result.df)
+                elif chart == WORDCLOUD:
+                    draw_wordcloud(ax, wordcloud)
+                elif chart == TOP_WORDS:
+                    draw_top_words(ax, result.word_frequencies)
+                else:
+                    raise ValueError(f"Unknown chart {chart!r}; expected one of {', '.join(CHARTS + (TOP_WORDS,))}.")
+            return save_png(fig, dpi, max_pixels, diagnostics)
+        finally:
+            fig.clear()
+
+
+def format_time_axis(ax):
+    # Format x-ticks to show only the time (H:M:S)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: mdates.num2date(x).strftime('%H:%M:%S')))
+
+
+def plot_series(ax, df, column, max_points=MAX_POINTS, **kwargs):
+    # A plain line through at most max_points points of the column over time,
+    # without seaborn's per-x aggregation and confidence band
+    times, values = downsample(df['time'].to_numpy(), df[column].to_numpy(), max_points)
+    ax.plot(times, values, **kwargs)
+
+
+def has_values(df, column):
+    return bool(df[column].notna().any())
+
+
+def draw_charts(axes, df, wordcloud=None, window=60):
+    draw_pace(axes[0, 0], df, window)
+    draw_vocabulary(axes[0, 1], df)
+    draw_fillers(axes[1, 0], df)
+    draw_wordcloud(axes[1, 1], wordcloud)
+
+
+def draw_pace(ax, df, window=60):
+    # Plot 1: Pace and Rolling Average Pace
+    plot_series(ax, df, 'pace', color='black')
+    # marker=False, linewidth=2.5, color='royalblue', label='Pace'
+    plot_series(ax, df, 'rolling_avg_pace', color='gray', linestyle=':')
+    # marker=False, linestyle='--', linewidth=2.5, color='orange', label='Rolling Avg Pace'
+    ax.set_title(f'Cumulative pace and moving average with a {window}-second window', fontsize=14, weight='bold')
+    ax.set_xlabel('Time', fontsize=12)
+    ax.set_ylabel('Words per minute', fontsize=12)
+    # ax.legend()
+    # ax.legend(loc='center', bbox_to_anchor=(0.85, 0.85), frameon=False)
+
+    colors = sns.color_palette("Oranges", len(wpm_data["Average WPM"]))
+
+    # Nothing plotted (no countable words): the labels would sit far outside the default axis range
+    if not has_values(df, 'pace'):
+        format_time_axis(ax)
+        return
+    for i, (level, wpm) in enumerate(zip(wpm_data["CEFR Level"], wpm_data["Average WPM"])):
+        ax.axhline(y=wpm, color=colors[i], linestyle='-', label=f'{level} - {wpm} WPM')
+        ax.text(x=df['time'].max(), y=wpm, s=f'{level} - {wpm} WPM', 
+                color=colors[i], va='bottom')
+    # ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+    format_time_axis(ax)
+
+
+def draw_vocabulary(ax, df):
+    # Plot 2: Number of Unique Words Over Time
+    # ________________________________________________________________________
+    # Align the precomputed reference curves with the chart's datetime x-axis
+    reference_times = np.datetime64(BASE_TIME) + (REFERENCE_MINUTES * 60e3).astype('timedelta64[ms]')
+
+    # Keep the part of the curves within the transcript's time range
+    in_range = (reference_times >= df['time'].min()) & (reference_times <= df['time'].max())
+    reference_times = reference_times[in_range]
+
+    # Use the "Oranges" color palette for the lines
+    colors = sns.color_palette("Oranges", len(scaling_factors))
+
+    plot_series(ax, df, 'num_unique_words', color='black')
+    # marker='o', linewidth=2.5,
+    ax.set_title('Number of unique words over time (vocabulary)', fontsize=14, weight='bold')
+    ax.set_xlabel('Time', fontsize=12)
+    ax.set_ylabel('Unique Words', fontsize=12)
+
+    # Add the reference curve for each CEFR level (short transcripts may not span a single grid point)
+    for i, level in enumerate(scaling_factors if len(reference_times) else ()):
+        scaled_words = REFERENCE_WORDS[i, in_range]
+        # Apply color from the palette for each line
+        ax.plot(reference_times, scaled_words, label=level, linestyle='-', color=colors[i])
+
+        # Add text near each line to label them
+        ax.text(reference_times[-1], scaled_words[-1], f'{level}', color=colors[i], va='center')
+    format_time_axis(ax)
+
+
+def draw_fillers(ax, df):
+    # Plot 3: Filler Word Share Over Time
+    plot_series(ax, df, 'fillers_share', color='black')
+    # marker='o', linewidth=2.5,
+    ax.set_title('Cumulative filler word share over time', fontsize=14, weight='bold')
+    ax.set_xlabel('Time', fontsize=12)
+    ax.set_ylabel('Share', fontsize=12)
+
+    colors = sns.color_palette("Oranges", len(wpm_data["Average WPM"]))
+    if not has_values(df, 'fillers_share'):
+        format_time_axis(ax)
+        return
+    ax.axhline(y=0.2, color=colors[-1], linestyle='-', label='20% level')
+    ax.text(x=df['time'].max(), y=0.2, s='20% level', 
+            color=colors[-1], va='bottom')
+    format_time_axis(ax)
+
+
+def draw_wordcloud(ax, wordcloud=None):
+    # Plot 4: Word Cloud of Unique Words
+    if wordcloud is not None:
+        ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')  # Hide axes
+    ax.set_title('Word frequency', fontsize=14, weight='bold')
+
+
+def draw_top_words(ax, frequencies, n=TOP_WORDS_BARS):
+    # Most frequent word at the top
+    words = top_words(frequencies, n)[::-1]
+    color = sns.color_palette("Oranges", len(LEVELS))[-2]
+    ax.barh([word for word, _ in words], [count for _, count in words], color=color)
+    ax.set_title(f'Top {len(words)} words', fontsize=14, weight='bold')
+    ax.set_xlabel('Count', fontsize=12)
+
+
+def timeline_png(timeline, figsize=TIMELINE_SIZE, dpi=FIGURE_DPI, max_pixels=MAX_PIXELS):
+    """Draw the per-window level range from :func:`fluency.timeline.level_timeline` as PNG bytes.
+
+    Raises ``ValueError`` for an empty timeline, i.e. a transcript without speech.
+    """
+    if timeline.empty:
+        raise ValueError("The level timeline is empty: no window has speech.")
+    with STYLE_LOCK, sns.axes_style("darkgrid"), sns.plotting_context("notebook"):
+        fig = Figure(figsize=figsize)
+        try:
+            ax = fig.subplots()
+            # Repeat the last window's values so its step spans the whole window
+            times = np.append(timeline['start'].to_numpy(), timeline['end'].to_numpy()[-1:])
+            lows = np.append(timeline['min_index'].to_numpy(), timeline['min_index'].to_numpy()[-1:])
+            highs = np.append(timeline['max_index'].to_numpy(), timeline['max_index'].to_numpy()[-1:])
+            color = sns.color_palette("Oranges", len(LEVELS))[-2]
+            ax.fill_between(times, lows - 0.4, highs + 0.4, step='post', color=color, alpha=0.6)
+            ax.step(times, (lows + highs) / 2, where='post', color='black')
+
+            window = (timeline['end'].iloc[0] - timeline['start'].iloc[0]).total_seconds()
+            ax.set_title(f'Language level range per {window / 60:g}-minute window', fontsize=14, weight='bold')
+            ax.set_xlabel('Time', fontsize=12)
+            ax.set_ylabel('Level', fontsize=12)
+            ax.set_yticks(range(len(LEVELS)), LEVELS)
+            ax.set_ylim(-0.5, len(LEVELS) - 0.5)
+            format_time_axis(ax)
+            return save_png(fig, dpi, max_pixels)
+        finally:
+            fig.clear()
+
+
+def warm_up():
+    """Load the plotting stack and its fonts so the first real render is not slowed down.
+
+    Builds matplotlib's font cache (written to disk on first use) and loads
+    the font WordCloud draws with by rendering a throwaway figure and cloud.
+    """
+    font_manager.findfont(font_manager.FontProperties())
+    fig = Figure(figsize=(1, 1))
+    fig.subplots().set_title('warm-up', fontsize=14, weight='bold')
+    fig.savefig(io.BytesIO(), format='png')
+    WordCloud(width=64, height=64).generate_from_frequencies({'warm': 1, 'up': 1})
+
+
+if __name__ == '__main__':
+    warm_up()
@@ -0,0 +1,275 @@
+"""Local HTTP JSON API: ``python -m fluency serve``.
+
+A small asyncio HTTP/1.1 server built on the standard library only. The
+event loop parses requests and hands each transcript to a bounded process
+pool, so one machine serves many concurrent clients without a browser
+session per transcript::
+
+    POST /analyze        {"transcript": "0:12\\nSo in college, ...", "window": 60,
+                          "fillers": "en", "format": null, "render": false}
+    POST /analyze/batch  {"transcripts": ["...", {"id": "a", "transcript": "..."}], "window": 60}
+    GET  /health
+
+``/analyze`` answers ``{"summary": {...}}`` with the numbers of the summary
+table (see :meth:`fluency.engine.Result.summary`), plus the skipped-line
+counts and, with ``"render": true``, the charts as a base64 PNG. The batch
+endpoint answers ``{"results": [...]}`` in request order, each item with
+either a ``summary`` or an ``error``.
+
+Bodies larger than ``max_body`` are refused with 413, and when more than
+``max_pending`` transcripts are already queued new requests get 503 with
+``Retry-After`` instead of piling up.
+"""
+import asyncio
+import base64
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+
+from . import ROLLING_WINDOW, ROLLING_WINDOWS
+from .cache import LRUCache, transcript_key
+
+MAX_BODY = 10 * 1024 * 1024
+MAX_BATCH = 100
+# Transcripts queued or running at once, per worker process
+PENDING_PER_WORKER = 8
+MAX_HEADERS = 100
+# Seconds a connection may wait between requests or take to send one
+IDLE_TIMEOUT = 30
+# Responses kept for repeated identical requests
+CACHE_ENTRIES = 256
+# Error of a transcript whose worker process died, e.g. out of memory
+WORKER_FAILED = "The analysis worker failed"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None, headers=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.headers = headers or {}
+
+
+def analyze_request(source, filler_words, fmt, window, render):
+    """Worker: analyze one transcript and return its JSON-ready response item."""
+    from .engine import analyze
+
+    try:
+        result = analyze(source, filler_words, fmt, window)
+    except Exception as e:
+        return {'error': str(e) or type(e).__name__}
+    item = {'summary': result.summary(), 'skipped': dict(result.parse_stats.skipped)}
+    if render:
+        from .render import figure_png, wordcloud_image
+
+        png = figure_png(result, wordcloud_image(result.word_frequencies))
+        item['png'] = base64.b64encode(png).decode('ascii')
+    return item
+
+
+def request_options(body):
+    """Validate the analysis options shared by both endpoints."""
+    from .cli import filler_lexicon
+    from .fillers import parse_lexicon
+    from .formats import FORMATS
+
+    window = body.get('window', ROLLING_WINDOW)
+    if window not in ROLLING_WINDOWS:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"window must be one of {list(ROLLING_WINDOWS)}")
+    fmt = body.get('format')
+    if fmt is not None and fmt not in FORMATS:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"format must be one of {list(FORMATS)}")
+    fillers = body.get('fillers')
+    if isinstance(fillers, list) and all(isinstance(filler, str) for filler in fillers):
+        filler_words = parse_lexicon('\n'.join(fillers))
+    elif fillers is None or isinstance(fillers, str):
+        filler_words = filler_lexicon(fillers)
+    else:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "fillers must be a language code, a comma-separated string or a list")
+    return tuple(filler_words), fmt, window, bool(body.get('render', False))
+
+
+def transcript_text(value):
+    if not isinstance(value, str) or not value:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "transcript must be a non-empty string")
+    return value
+
+
+class AnalysisServer:
+    """Routes requests to a bounded pool of analysis processes."""
+
+    def __init__(self, jobs=None, max_body=MAX_BODY, max_batch=MAX_BATCH, max_pending=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_body = max_body
+        self.max_batch = max_batch
+        # A full batch must always fit when the server is idle
+        self.max_pending = max(max_pending or self.jobs * PENDING_PER_WORKER, max_batch)
+        self.pending = 0
+        self.pool = None
+        self.cache = LRUCache(CACHE_ENTRIES)
+
+    def start_pool(self):
+        self.pool = ProcessPoolExecutor(self.jobs)
+
+    def restart_pool(self, pool):
+        """Replace ``pool`` after one of its workers died; a no-op if another request already did."""
+        if self.pool is pool:
+            print("An analysis worker died; restarting the pool", file=sys.stderr)
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.start_pool()
+
+    async def analyze_all(self, sources, options):
+        """Analyze ``sources`` on the pool, or raise 503 when the queue has no room for them."""
+        keys = [transcript_key(source, *options) for source in sources]
+        # The response is built from this snapshot and the new results; the LRU is only written to,
+        # since other requests may evict entries from it while this one waits
+        items = {key: item for key in set(keys) if (item := self.cache.get(key)) is not None}
+        missing = {key: source for key, source in zip(keys, sources) if key not in items}
+        if self.pending + len(missing) > self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many transcripts queued, retry shortly",
+                            {'Retry-After': '1'})
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        self.pending += len(missing)
+        try:
+            try:
+                futures = [loop.run_in_executor(pool, analyze_request, source, *options)
+                           for source in missing.values()]
+            except BrokenProcessPool:
+                self.restart_pool(pool)
+                raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "The analysis workers are restarting, retry shortly",
+                                {'Retry-After': '1'}) from None
+            results = await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            self.pending -= len(missing)
+        for key, item in zip(missing, results):
+            if isinstance(item, BaseException):
+                if isinstance(item, BrokenProcessPool):
+                    self.restart_pool(pool)
+                item = {'error': WORKER_FAILED}
+            else:
+                self.cache.put(key, item)
+            items[key] = item
+        return [items[key] for key in keys]
+
+    async def route(self, method, path, body):
+        """Return the status and JSON payload for one request."""
+        if path == '/health':
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, headers={'Allow': 'GET'})
+            return HTTPStatus.OK, {'status': 'ok', 'workers': self.jobs, 'pending': self.pending}
+        if path not in ('/analyze', '/analyze/batch'):
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, headers={'Allow': 'POST'})
+        try:
+            body = json.loads(body)
+        except (UnicodeDecodeError, ValueError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object") from None
+        if not isinstance(body, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        options = request_options(body)
+
+        if path == '/analyze':
+            item, = await self.analyze_all([transcript_text(body.get('transcript'))], options)
+            if 'error' in item:
+                failed = item['error'] == WORKER_FAILED
+                raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR if failed else HTTPStatus.UNPROCESSABLE_ENTITY,
+                                item['error'])
+            return HTTPStatus.OK, item
+
+        entries = body.get('transcripts')
+        if not isinstance(entries, list) or not entries:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "transcripts must be a non-empty list")
+        if len(entries) > self.max_batch:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {self.max_batch} transcripts per batch")
+        # Plain strings are identified by their position
+        ids = [entry.get('id', i) if isinstance(entry, dict) else i for i, entry in enumerate(entries)]
+        sources = [transcript_text(entry.get('transcript') if isinstance(entry, dict) else entry) for entry in entries]
+        items = await self.analyze_all(sources, options)
+        return HTTPStatus.OK, {'results': [{'id': id_, **item} for id_, item in zip(ids, items)]}
+
+    async def read_request(self, reader):
+        """Return ``(method, path, version, headers, body)``, or ``None`` when the client closed the connection."""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Send a Content-Length instead of a chunked body")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+        if length > self.max_body:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body larger than {self.max_body} bytes")
+        body = await reader.readexactly(length) if length > 0 else b''
+        return method, target.split('?', 1)[0], version, headers, body
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection, keeping it open between them unless asked not to."""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), IDLE_TIMEOUT)
+                    if request is None:
+                        break
+                    method, path, version, headers, body = request
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                    status, payload = await self.route(method, path, body)
+                    extra = {}
+                except HTTPError as e:
+                    status, payload, extra = e.status, {'error': str(e)}, e.headers
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                    # A truncated body, or a header line longer than the reader's limit
+                    status, payload, extra = HTTPStatus.BAD_REQUEST, {'error': "Malformed request"}, {}
+                except TimeoutError:
+                    break
+                except Exception as e:
+                    print(f"Error handling a request: {e!r}", file=sys.stderr)
+                    status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal error"}, {}
+                data = json.dumps(payload).encode('utf-8')
+                head = [f'HTTP/1.1 {status.value} {status.phrase}', 'Content-Type: application/json',
+                        f'Content-Length: {len(data)}', f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                        *(f'{name}: {value}' for name, value in extra.items())]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        self.start_pool()
+        try:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = ', '.join(str(sock.getsockname()[:2]) for sock in server.sockets)
+            print(f"Serving on {address} with {self.jobs} workers", file=sys.stderr)
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def serve(args):
+    server = AnalysisServer(args.jobs, int(args.max_body_mb * 1024 * 1024), args.max_batch, args.max_pending)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
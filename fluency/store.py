@@ -0,0 +1,153 @@
+"""Optional on-disk store of analysis artifacts shared by several app workers.
+
+Artifacts (the pickled :class:`~fluency.Result`, the summary table HTML and
+rendered images) live in one SQLite file, keyed by the transcript hash, the
+analyzer version and the artifact kind. SQLite handles locking between
+processes, so every replica pointed at the same file can reuse what any
+other replica computed, including after a restart.
+
+Entries older than ``ttl`` seconds are dropped, and when the store grows
+past ``max_bytes`` the least recently read entries go first. Entries
+written by another analyzer version are purged when the store is opened.
+
+The store is trusted: results are pickled, so only point it at a file
+written by this application.
+"""
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from . import ANALYZER_VERSION
+
+# Artifact kinds
+RESULT = 'result'
+SUMMARY = 'summary'
+FIGURE = 'figure'
+WORDCLOUD = 'wordcloud'
+
+DEFAULT_TTL = 7 * 24 * 3600  # One week
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS artifacts (
+    key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (key, version, kind)
+);
+CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed);
+CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created);
+'''
+
+
+class ResultStore:
+    """SQLite-backed artifact store with TTL and size-based LRU eviction."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, version=ANALYZER_VERSION):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.version = version
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            conn.execute('DELETE FROM artifacts WHERE version != ?', (version,))
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the store safe to use
+        # from Streamlit's script threads and from several processes
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key, kind):
+        """Return the stored bytes, or ``None`` if missing or expired."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT data, created FROM artifacts WHERE key = ? AND version = ? AND kind = ?',
+                (key, self.version, kind)
+            ).fetchone()
+            if row is None:
+                return None
+            data, created = row
+            if now - created > self.ttl:
+                conn.execute('DELETE FROM artifacts WHERE key = ? AND version = ? AND kind = ?',
+                             (key, self.version, kind))
+                return None
+            conn.execute('UPDATE artifacts SET accessed = ? WHERE key = ? AND version = ? AND kind = ?',
+                         (now, key, self.version, kind))
+        return data
+
+    def put(self, key, kind, data):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO artifacts (key, version, kind, data, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, self.version, kind, data, len(data), now, now)
+            )
+        self.evict()
+
+    def get_or_compute(self, key, kind, compute):
+        """Return stored bytes for ``key``/``kind``, storing ``compute()`` on a miss."""
+        data = self.get(key, kind)
+        if data is None:
+            data = compute()
+            self.put(key, kind, data)
+        return data
+
+    def get_result(self, key):
+        data = self.get(key, RESULT)
+        return None if data is None else pickle.loads(data)
+
+    def put_result(self, key, result):
+        self.put(key, RESULT, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def size(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+
+    def evict(self):
+        """Drop expired entries, then least recently read ones until under ``max_bytes``."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM artifacts WHERE created < ?', (time.time() - self.ttl,))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = conn.execute('SELECT key, version, kind, size FROM artifacts ORDER BY accessed')
+            doomed = []
+            for key, version, kind, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key, version, kind))
+                total -= size
+            conn.executemany('DELETE FROM artifacts WHERE key = ? AND version = ? AND kind = ?', doomed)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM artifacts')
+
+
+def open_store(path=None):
+    """Open the store configured by ``FLUENCY_STORE``, or return ``None`` if unset.
+
+    ``FLUENCY_STORE_TTL`` (seconds) and ``FLUENCY_STORE_MAX_MB`` override the
+    default expiry and size limit.
+    """
+    path = path or os.environ.get('FLUENCY_STORE')
+    if not path:
+        return None
+    ttl = float(os.environ.get('FLUENCY_STORE_TTL', DEFAULT_TTL))
+    max_bytes = int(float(os.environ.get('FLUENCY_STORE_MAX_MB', DEFAULT_MAX_BYTES / 2**20)) * 2**20)
+    return ResultStore(path, ttl=ttl, max_bytes=max_bytes)
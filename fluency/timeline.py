@@ -0,0 +1,73 @@
+"""Level estimate per stretch of a transcript.
+
+The transcript is cut into consecutive windows by segment start time, and
+each window's pace and vocabulary growth are classified exactly like the
+whole transcript is. All windows come out of one pass over prefix sums of
+the metrics frame, so hour-long transcripts stay interactive.
+"""
+import numpy as np
+import pandas as pd
+
+from .levels import LEVELS, vocab_growth_level_indices, wpm_level_indices
+
+# Default window length in seconds
+TIMELINE_WINDOW = 120
+
+
+TIMELINE_COLUMNS = [
+    'start', 'end', 'num_words', 'duration_clean', 'wpm', 'new_unique_words',
+    'min_index', 'max_index', 'min_level', 'max_level',
+]
+
+
+def level_timeline(df, window=TIMELINE_WINDOW):
+    """Return one row per ``window``-second stretch of ``df`` that has speech.
+
+    Columns: ``start`` and ``end`` of the window, ``num_words``,
+    ``duration_clean``, ``wpm``, ``new_unique_words``, the ``min_level`` and
+    ``max_level`` names and their indices into :data:`~fluency.levels.LEVELS`.
+    """
+    times = df['time'].to_numpy()
+    if not len(times):
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+    # Captions are normally in order; like rolling_pace, an earlier timestamp
+    # after a later one counts as part of the later one's window
+    elapsed = np.maximum.accumulate((times - times[0]) / np.timedelta64(1, 's'))
+    edges = np.arange(0, elapsed[-1] + window, window, dtype=float)
+    bounds = np.searchsorted(elapsed, edges, side='left')
+    if bounds[-1] < len(elapsed):
+        bounds = np.append(bounds, len(elapsed))
+        edges = np.append(edges, edges[-1] + window)
+    first, last = bounds[:-1], bounds[1:]
+
+    # Prefix sums, so every window is the difference of two entries
+    words = np.concatenate(([0], df['cumulative_num_words'].to_numpy()))
+    seconds = np.concatenate(([0.0], df['cumulative_duration_clean'].to_numpy(dtype=float)))
+    vocabulary = np.concatenate(([0], df['num_unique_words'].to_numpy()))
+
+    num_words = words[last] - words[first]
+    duration_clean = seconds[last] - seconds[first]
+    new_unique_words = vocabulary[last] - vocabulary[first]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wpm = num_words / duration_clean * 60.0
+
+    wpm_min, wpm_max = wpm_level_indices(wpm)
+    vocab_min, vocab_max = vocab_growth_level_indices(new_unique_words, seconds[first] / 60.0, seconds[last] / 60.0)
+    min_index = np.minimum(wpm_min, vocab_min)
+    max_index = np.maximum(wpm_max, vocab_max)
+
+    start = times[0] + (edges[:-1] * 1e3).astype('timedelta64[ms]')
+    timeline = pd.DataFrame({
+        'start': start,
+        'end': start + np.timedelta64(int(window * 1e3), 'ms'),
+        'num_words': num_words,
+        'duration_clean': duration_clean,
+        'wpm': wpm,
+        'new_unique_words': new_unique_words,
+        'min_index': min_index,
+        'max_index': max_index,
+        'min_level': LEVELS[min_index],
+        'max_level': LEVELS[max_index],
+    })
+    # Windows that fall into a pause have nothing to classify
+    return timeline[duration_clean > 0].reset_index(drop=True)
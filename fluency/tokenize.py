@@ -0,0 +1,16 @@
+"""The one tokenizer every metric is computed from.
+
+Words are case-folded and stripped of surrounding punctuation, so "So,"
+and "so" are the same word everywhere: in word counts, filler detection,
+vocabulary growth and the word cloud. Hyphenated words and contractions
+("writer-blogger", "I'm") stay single tokens, as they were with
+``str.split``; free-standing punctuation such as "--" is not a word.
+"""
+import re
+
+TOKEN_RE = re.compile(r"[^\W_]+(?:[-'’][^\W_]+)*")
+
+
+def tokenize(text):
+    """Return the list of normalized word tokens in ``text``."""
+    return TOKEN_RE.findall(text.casefold())
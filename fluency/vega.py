@@ -0,0 +1,223 @@
+"""Vega-Lite specifications for the line charts, drawn in the browser.
+
+An alternative to the server-side PNGs of :mod:`fluency.render`: each
+function returns a plain ``dict`` spec with the (downsampled) series
+inlined as compact JSON, and the CEFR reference lines as overlay layers.
+The browser renders, zooms and pans the chart, so the server only
+serializes a few thousand numbers. No plotting library is imported.
+
+Times are sent as milliseconds since the start of the transcript's time
+axis and shown as ``H:M:S`` in UTC so no time zone shifts them.
+"""
+import numpy as np
+
+from .downsample import MAX_POINTS, downsample
+from .engine import BASE_TIME
+from .levels import REFERENCE_MINUTES, REFERENCE_WORDS, scaling_factors, wpm_data
+
+SCHEMA = 'https://vega.github.io/schema/vega-lite/v5.json'
+
+TIME_AXIS = {'title': 'Time', 'format': '%H:%M:%S', 'formatType': 'utc'}
+# Level colors follow the "Oranges" palette of the static charts
+LEVEL_COLOR = {'field': 'level', 'type': 'nominal', 'scale': {'scheme': 'oranges'}, 'legend': None, 'sort': None}
+# Drag to pan and scroll to zoom on the time axis
+ZOOM = [{'name': 'zoom', 'select': {'type': 'interval', 'encodings': ['x']}, 'bind': 'scales'}]
+
+
+def series_values(df, column, max_points=MAX_POINTS, digits=4):
+    """Return the downsampled ``column`` over time as ``[{'t': ms, 'y': value}, ...]``."""
+    times, values = downsample(df['time'].to_numpy(), df[column].to_numpy(), max_points)
+    milliseconds = (times - np.datetime64(BASE_TIME)) // np.timedelta64(1, 'ms')
+    return [{'t': int(t), 'y': round(float(y), digits)} for t, y in zip(milliseconds, values)]
+
+
+def line_layer(values, title, color='black', dash=None, zoom=False):
+    layer = {
+        'data': {'values': values},
+        'mark': {'type': 'line', 'color': color, **({'strokeDash': dash} if dash else {})},
+        'encoding': {
+            'x': {'field': 't', 'type': 'temporal', 'scale': {'type': 'utc'}, 'axis': TIME_AXIS},
+            'y': {'field': 'y', 'type': 'quantitative', 'title': title},
+            'tooltip': [
+                {'field': 't', 'type': 'temporal', 'title': 'Time', 'format': '%H:%M:%S', 'formatType': 'utc'},
+                {'field': 'y', 'type': 'quantitative', 'title': title},
+            ],
+        },
+    }
+    if zoom:
+        layer['params'] = ZOOM
+    return layer
+
+
+def threshold_layers(levels):
+    """Horizontal reference rules with a label at the right edge, one per ``{'level', 'y'}`` row."""
+    encoding = {'y': {'field': 'y', 'type': 'quantitative'}, 'color': LEVEL_COLOR}
+    return [
+        {'data': {'values': levels}, 'mark': 'rule', 'encoding': encoding},
+        {
+            'data': {'values': levels},
+            'mark': {'type': 'text', 'align': 'right', 'baseline': 'bottom', 'x': 'width', 'dx': -4},
+            'encoding': {**encoding, 'text': {'field': 'label'}},
+        },
+    ]
+
+
+def spec(title, layers):
+    return {'$schema': SCHEMA, 'title': title, 'height': 400, 'layer': layers}
+
+
+def pace_levels():
+    return [
+        {'level': level, 'y': wpm, 'label': f'{level} - {wpm} WPM'}
+        for level, wpm in zip(wpm_data['CEFR Level'], wpm_data['Average WPM'])
+    ]
+
+
+def vocabulary_reference(end):
+    """Each level's unique-word curve up to ``end``, a time on the transcript axis, as a line layer."""
+    end_minutes = (end - BASE_TIME).total_seconds() / 60
+    in_range = REFERENCE_MINUTES <= end_minutes
+    reference = [
+        {'t': int(minutes * 60e3), 'y': round(float(words), 1), 'level': level}
+        for i, level in enumerate(scaling_factors)
+        for minutes, words in zip(REFERENCE_MINUTES[in_range], REFERENCE_WORDS[i, in_range])
+    ]
+    if not reference:
+        return None
+    return {
+        'data': {'values': reference},
+        'mark': 'line',
+        'encoding': {
+            'x': {'field': 't', 'type': 'temporal'},
+            'y': {'field': 'y', 'type': 'quantitative'},
+            'color': {**LEVEL_COLOR, 'legend': {'title': 'Level', 'orient': 'top-left'}},
+        },
+    }
+
+
+# The 20% reference level of the filler share
+FILLER_LEVELS = [{'level': '20%', 'y': 0.2, 'label': '20% level'}]
+
+
+def pace_spec(result, max_points=MAX_POINTS):
+    """Cumulative pace and its moving average, with the WPM of each CEFR level."""
+    levels = pace_levels()
+    return spec(
+        f'Cumulative pace and moving average with a {result.rolling_window}-second window',
+        [
+            line_layer(series_values(result.df, 'pace', max_points, 2), 'Words per minute', zoom=True),
+            line_layer(series_values(result.df, 'rolling_avg_pace', max_points, 2), 'Moving average',
+                       color='gray', dash=[2, 2]),
+            *threshold_layers(levels),
+        ],
+    )
+
+
+def vocabulary_spec(result, max_points=MAX_POINTS):
+    """Unique words over time, with each level's reference curve within the transcript's time range."""
+    df = result.df
+    layers = [line_layer(series_values(df, 'num_unique_words', max_points, 0), 'Unique Words', zoom=True)]
+    reference = vocabulary_reference(df['time'].max())
+    if reference:
+        layers.append(reference)
+    return spec('Number of unique words over time (vocabulary)', layers)
+
+
+def fillers_spec(result, max_points=MAX_POINTS):
+    """Cumulative filler share, with the 20% reference level."""
+    return spec(
+        'Cumulative filler word share over time',
+        [
+            line_layer(series_values(result.df, 'fillers_share', max_points), 'Share', zoom=True),
+            *threshold_layers(FILLER_LEVELS),
+        ],
+    )
+
+
+# Line charts of the comparison view: (column, title, axis title, digits)
+COMPARISONS = {
+    'pace': ('pace', 'Cumulative pace', 'Words per minute', 2),
+    'vocabulary': ('num_unique_words', 'Number of unique words over time (vocabulary)', 'Unique Words', 0),
+    'fillers': ('fillers_share', 'Cumulative filler word share over time', 'Share', 4),
+}
+
+
+def comparison_spec(chart, labels, results, max_points=MAX_POINTS):
+    """One chart's series of several transcripts overlaid on shared axes, with its reference lines.
+
+    ``chart`` is one of ``'pace'``, ``'vocabulary'`` and ``'fillers'``.
+    """
+    column, title, axis_title, digits = COMPARISONS[chart]
+    values = [
+        {**point, 'transcript': label}
+        for label, result in zip(labels, results)
+        for point in series_values(result.df, column, max_points, digits)
+    ]
+    layer = line_layer(values, axis_title, zoom=True)
+    del layer['mark']['color']
+    layer['encoding']['color'] = {
+        'field': 'transcript', 'type': 'nominal', 'sort': list(labels),
+        'scale': {'scheme': 'tableau10'}, 'legend': {'title': 'Transcript', 'orient': 'bottom'},
+    }
+    layer['encoding']['tooltip'].insert(0, {'field': 'transcript', 'type': 'nominal', 'title': 'Transcript'})
+    layers = [layer]
+    if chart == 'pace':
+        layers += threshold_layers(pace_levels())
+    elif chart == 'vocabulary':
+        reference = vocabulary_reference(max(result.df['time'].max() for result in results))
+        if reference:
+            layers.append(reference)
+    else:
+        layers += threshold_layers(FILLER_LEVELS)
+    # Transcripts and levels each get their own color scale
+    return {**spec(title, layers), 'resolve': {'scale': {'color': 'independent'}}}
+
+
+# Metrics of the progress chart: (session column, axis title)
+PROGRESS_METRICS = (
+    ('wpm', 'Words per minute'),
+    ('unique_words_per_minute', 'Unique words per minute'),
+    ('fillers_percentage', 'Fillers, %'),
+)
+
+
+def progress_spec(sessions):
+    """One small chart per metric across saved sessions, sharing the date axis.
+
+    ``sessions`` are the summary rows of :meth:`fluency.history.HistoryStore.sessions`.
+    """
+    values = [
+        {
+            't': int(session['created'] * 1000),
+            'level': f"{session['min_level']} - {session['max_level']}",
+            'minutes': round(session['minutes'], 1),
+            **{column: None if session[column] is None else round(session[column], 2) for column, _ in PROGRESS_METRICS},
+        }
+        for session in sessions
+    ]
+    x = {'field': 't', 'type': 'temporal', 'title': 'Date', 'axis': {'format': '%Y-%m-%d'}}
+    charts = [
+        {
+            'height': 180,
+            'width': 'container',
+            'mark': {'type': 'line', 'point': True, 'color': 'black'},
+            'encoding': {
+                'x': x,
+                'y': {'field': column, 'type': 'quantitative', 'title': title, 'scale': {'zero': False}},
+                'tooltip': [
+                    {'field': 't', 'type': 'temporal', 'title': 'Date', 'format': '%Y-%m-%d %H:%M'},
+                    {'field': column, 'type': 'quantitative', 'title': title},
+                    {'field': 'level', 'type': 'nominal', 'title': 'Level'},
+                    {'field': 'minutes', 'type': 'quantitative', 'title': 'Minutes'},
+                ],
+            },
+        }
+        for column, title in PROGRESS_METRICS
+    ]
+    return {
+        '$schema': SCHEMA,
+        'title': 'Progress across sessions',
+        'data': {'values': values},
+        'vconcat': charts,
+        'resolve': {'scale': {'x': 'shared'}},
+    }
@@ -0,0 +1,89 @@
+"""Dictionary-encoded storage of a transcript's tokens.
+
+Each distinct token is stored once in a vocabulary list, and the
+transcript becomes one ``int32`` array of token IDs plus the offsets where
+each segment starts. That is 4 bytes per spoken word instead of a Python
+string per word and a copy of every segment's text, and vocabulary
+growth and word frequencies become whole-array NumPy operations.
+"""
+from array import array
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class TokenTable:
+    """Token IDs of every segment: segment ``i`` is ``ids[offsets[i]:offsets[i + 1]]``."""
+    vocabulary: list = field(default_factory=list)
+    ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def segment(self, i):
+        """The tokens of segment ``i`` as strings."""
+        vocabulary = self.vocabulary
+        return [vocabulary[token] for token in self.ids[self.offsets[i]:self.offsets[i + 1]]]
+
+    def word_counts(self):
+        return np.diff(self.offsets)
+
+    def counts(self):
+        """How often each vocabulary entry occurs, indexed by token ID."""
+        return np.bincount(self.ids, minlength=len(self.vocabulary))
+
+    def frequencies(self):
+        """The word frequency table as a ``{word: count}`` dict."""
+        return dict(zip(self.vocabulary, self.counts().tolist()))
+
+    def unique_word_counts(self):
+        """Running number of distinct words up to and including each segment."""
+        # Position of each word's first occurrence, mapped to the segment it falls in
+        _, first = np.unique(self.ids, return_index=True)
+        segments = np.searchsorted(self.offsets, first, side='right') - 1
+        return np.cumsum(np.bincount(segments, minlength=len(self)))
+
+
+class TokenEncoder:
+    """Builds a :class:`TokenTable` one segment at a time."""
+
+    def __init__(self):
+        self.index = {}
+        self.vocabulary = []
+        self.ids = array('i')
+        self.offsets = array('q', [0])
+        # Vocabulary size after each segment: the running unique word count
+        self.sizes = array('q')
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def add(self, tokens):
+        """Append one segment's tokens."""
+        index, vocabulary = self.index, self.vocabulary
+        for token in tokens:
+            if token not in index:
+                index[token] = len(vocabulary)
+                vocabulary.append(token)
+        self.ids.extend([index[token] for token in tokens])
+        self.offsets.append(len(self.ids))
+        self.sizes.append(len(vocabulary))
+
+    def truncate(self, segments):
+        """Forget every segment after the first ``segments``, and the words they introduced."""
+        size = self.sizes[segments - 1] if segments else 0
+        for token in self.vocabulary[size:]:
+            del self.index[token]
+        del self.vocabulary[size:]
+        del self.ids[self.offsets[segments]:]
+        del self.offsets[segments + 1:]
+        del self.sizes[segments:]
+
+    def table(self):
+        return TokenTable(
+            list(self.vocabulary),
+            np.frombuffer(self.ids, dtype=np.int32).copy(),
+            np.frombuffer(self.offsets, dtype=np.int64).copy(),
+        )
@@ -7,16 +7,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-import pandas as pd
-import re
-from wordcloud import WordCloud
-import seaborn as sns
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.ticker import FuncFormatter
-from datetime import timedelta, datetime
-from scipy.interpolate import interp1d
-import numpy as np
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Only light modules are imported up front so the page paints quickly on a cold
+# container; pandas, matplotlib, seaborn and wordcloud load when text arrives.
+from fluency import ROLLING_WINDOW, ROLLING_WINDOWS
+from fluency.cache import LRUCache, transcript_key
+from fluency.fillers import FILLER_WORDS, LEXICONS, parse_lexicon
+from fluency.diagnostics import Diagnostics, diagnostics_enabled, enable_logging, stage
+from fluency.history import open_history
+from fluency.store import FIGURE, SUMMARY, open_store
 
 
 # Add text to the left sidebar
@@ -527,365 +530,385 @@ and lots and lots of PhD students.
 with st.expander("👉Click to reveal the example👈"):
     st.code(example)
 
-input_text = st.text_area("Enter your text with timestamps:", height=200)
+# Streamlit reruns this script on every interaction, so each stage is memoized
+# on the transcript's content hash and shared across sessions, keeping at most
+# CACHE_ENTRIES of the most recently used transcripts. When FLUENCY_STORE points
+# at a SQLite file, results are also persisted there and shared between workers.
+CACHE_ENTRIES = 32
+
+
+@st.cache_resource
+def result_store():
+    return open_store()
+
+
+@st.cache_resource
+def history_store():
+    return open_history()
+
+
+@st.cache_resource
+def start_warm_up():
+    # Load the analysis and plotting stack in the background, once per process
+    def load():
+        import fluency.engine
+        from fluency.render import warm_up
+        warm_up()
+    threading.Thread(target=load, daemon=True).start()
+
+
+@st.cache_resource
+def diagnostics_logging():
+    enable_logging()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def analyze_transcript(key, _source, window, _filler_words=FILLER_WORDS, _diagnostics=None, _incremental=None):
+    from fluency import analyze
+
+    store = result_store()
+    result = store.get_result(key) if store else None
+    if result is None:
+        if _incremental is not None:
+            result = _incremental.update(_source, diagnostics=_diagnostics)
+        else:
+            result = analyze(_source, _filler_words, window=window, diagnostics=_diagnostics)
+        if store:
+            store.put_result(key, result)
+    return result
+
+
+def incremental_analyzer(window, filler_words):
+    """This session's analyzer for pasted text, which only processes what was appended since the last run."""
+    from fluency.incremental import IncrementalAnalyzer
+
+    analyzer = st.session_state.get("incremental_analyzer")
+    if analyzer is None or analyzer.window != window or analyzer.filler_words != filler_words:
+        analyzer = st.session_state.incremental_analyzer = IncrementalAnalyzer(filler_words, window)
+    return analyzer
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def summary_html(key, _result):
+    store = result_store()
+    if store:
+        html = store.get_or_compute(key, SUMMARY, lambda: _result.info_df().to_html(index=False).encode('utf-8'))
+        return html.decode('utf-8')
+    return _result.info_df().to_html(index=False)
+
+
+# Compared transcripts are analyzed on worker processes, since the analysis holds the GIL
+COMPARE_WORKERS = os.cpu_count() or 1
+# Most transcripts offered for comparison at once
+MAX_COMPARED = 8
+
+
+@st.cache_resource
+def analysis_pool():
+    # Workers come from a clean forkserver process: forking this one, with Tornado and the
+    # render threads running, could copy a lock (STYLE_LOCK, logging) held by another thread
+    return ProcessPoolExecutor(COMPARE_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+
+
+@st.cache_resource
+def comparison_cache():
+    # (result, error) by transcript key, so adding a transcript to a comparison
+    # does not analyze the others again
+    return LRUCache(CACHE_ENTRIES)
+
+
+def compare_transcripts(keys, sources, window, filler_words):
+    """Analyze the transcripts not analyzed yet all at once; returns ``(result, error)`` pairs."""
+    from fluency.compare import WORKER_FAILED, analyze_all
+
+    cache, store = comparison_cache(), result_store()
+    analyzed = {}
+    for key in keys:
+        entry = cache.get(key)
+        if entry is None and store and (result := store.get_result(key)) is not None:
+            entry = result, None
+        if entry is not None:
+            analyzed[key] = entry
+    missing = {key: source for key, source in zip(keys, sources) if key not in analyzed}
+    pool = analysis_pool()
+    broken = False
+    for key, (result, error) in zip(missing, analyze_all(missing.values(), pool, filler_words, window)):
+        analyzed[key] = result, error
+        if error == WORKER_FAILED:
+            # Not cached, so that the transcript is retried on the next run
+            broken = True
+            continue
+        cache.put(key, (result, error))
+        if store and result is not None:
+            store.put_result(key, result)
+    if broken:
+        # A dead worker leaves the pool broken for good: the next run starts a new one
+        analysis_pool.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return [analyzed[key] for key in keys]
+
+
+# Charts render on a small thread pool and are shown as each one finishes
+RENDER_THREADS = 4
+
+# Chart panels, in the order they are laid out; "timeline" is the level timeline below the grid
+CHARTS = ("pace", "vocabulary", "fillers", "wordcloud")
+TIMELINE = "timeline"
+# Cheaper stand-in for the word cloud, offered for long transcripts
+TOP_WORDS = "top words"
+# Transcripts with more segments than this (about an hour and a half of speech)
+# default to the top words chart instead of the word cloud
+LARGE_TRANSCRIPT_SEGMENTS = 2000
+
+
+@st.cache_resource
+def render_pool():
+    return ThreadPoolExecutor(RENDER_THREADS, thread_name_prefix="render")
+
+
+@st.cache_resource
+def chart_cache():
+    # Rendered PNGs by (transcript key, chart). The pool threads have no script
+    # context and cannot use st.cache_data, so they share this thread-safe LRU instead
+    return LRUCache(CACHE_ENTRIES * (len(CHARTS) + 1))
+
+
+def render_chart(key, result, chart, cache, store=None, diagnostics=None, full=False):
+    """Render one chart to PNG bytes, or take it from ``cache``; runs on the render pool.
+
+    The word cloud is a low-resolution preview unless ``full`` is set.
+    """
+    from fluency.render import PREVIEW_SIZE, WORDCLOUD_SIZE, chart_png, timeline_png, top_words, wordcloud_image
+    from fluency.timeline import level_timeline
+
+    kind = chart
+    if chart == "wordcloud":
+        kind = "wordcloud" if full else "wordcloud preview"
+        # The cloud depends only on the words drawn, so it is keyed by them rather than
+        # by the transcript and is reused across moving-average windows
+        key = transcript_key(repr(top_words(result.word_frequencies)))
+
+    def draw():
+        if chart == TIMELINE:
+            return timeline_png(level_timeline(result.df))
+        wordcloud = None
+        if chart == "wordcloud":
+            with stage(diagnostics, "wordcloud image", len(result.word_frequencies)):
+                wordcloud = wordcloud_image(result.word_frequencies, WORDCLOUD_SIZE if full else PREVIEW_SIZE)
+        return chart_png(result, chart, wordcloud, diagnostics=diagnostics)
+
+    def stored():
+        return store.get_or_compute(key, f"{FIGURE}:{kind}", draw) if store else draw()
+
+    with stage(diagnostics, kind):
+        return cache.get_or_compute((key, kind), stored)
+
+
+if os.environ.get("FLUENCY_WARMUP"):
+    start_warm_up()
+
+# With FLUENCY_HISTORY set, sessions can be saved under a name to follow progress over time
+history = history_store()
+history_user = ""
+if history is not None:
+    st.sidebar.title("Your Progress:")
+    history_user = st.sidebar.text_input("Name to save sessions under:").strip()
+
+# Comparison mode: e.g. a learner against a native reference, or this month against last month
+compare = st.toggle("Compare several transcripts")
+compared = []
+if compare:
+    input_text, uploaded_file = "", None
+    pasted = st.number_input("Pasted transcripts:", min_value=0, max_value=MAX_COMPARED, value=2)
+    columns = st.columns(2)
+    for i in range(pasted):
+        text = columns[i % 2].text_area(f"Transcript {i + 1}:", height=150, key=f"compare_text_{i}")
+        if text:
+            compared.append((f"Transcript {i + 1}", text))
+    for file in st.file_uploader(
+        "...and/or upload caption files (SRT, WebVTT or YouTube json3):",
+        type=["srt", "vtt", "json", "json3", "txt"],
+        accept_multiple_files=True
+    ):
+        compared.append((file.name, file.getvalue()))
+    if len(compared) > MAX_COMPARED:
+        st.warning(f"Only the first {MAX_COMPARED} transcripts are compared.")
+        compared = compared[:MAX_COMPARED]
+else:
+    input_text = st.text_area("Enter your text with timestamps:", height=200)
+    uploaded_file = st.file_uploader(
+        "...or upload a caption file (SRT, WebVTT or YouTube json3):",
+        type=["srt", "vtt", "json", "json3", "txt"]
+    )
+window = st.select_slider(
+    "Moving average window for Max/Min WPM:",
+    options=ROLLING_WINDOWS,
+    value=ROLLING_WINDOW,
+    format_func=lambda seconds: f"{seconds} s"
+)
+# Filler lexicon: start from a language's list and edit it; phrases are matched as whole words
+FILLER_LANGUAGES = {"English": "en", "German": "de", "Spanish": "es", "French": "fr"}
+
+
+def load_filler_preset():
+    language = FILLER_LANGUAGES.get(st.session_state.filler_preset)
+    st.session_state.filler_lexicon = "\n".join(LEXICONS[language] if language else FILLER_WORDS)
+
+
+st.session_state.setdefault("filler_lexicon", "\n".join(FILLER_WORDS))
+with st.expander("Filler words"):
+    st.selectbox("Start from a list:", ["Default", *FILLER_LANGUAGES], key="filler_preset", on_change=load_filler_preset)
+    st.text_area('One filler per line; phrases like "you know" work too:', key="filler_lexicon", height=150)
+filler_words = parse_lexicon(st.session_state.filler_lexicon)
+
+# Interactive charts are drawn by the browser from the downsampled series (zoom with the mouse wheel);
+# compared transcripts are always drawn that way
+chart_mode = "Interactive" if compare else st.radio("Charts:", ["Static images", "Interactive"], horizontal=True)
 st.write("")  # Adds a blank line (space)
+if uploaded_file is not None:
+    input_text = uploaded_file.getvalue()
+# Per-stage timings, on for every request with FLUENCY_DIAGNOSTICS=1 or for one page with ?diagnostics=1
+show_diagnostics = diagnostics_enabled() or st.query_params.get("diagnostics", "").lower() in ("1", "true")
 if input_text:
-    pre_lines = input_text.strip().split('\n')
-    # Check if the current element is in time format (numbers separated by colons)
-    def correct_list(lines):
-        i = 0
-        while i < len(lines) - 1:
-            if not lines[i].replace(':', '').isdigit():
-                lines.pop(i)
-                continue
-            if lines[i + 1].replace(':', '').isdigit():
-                lines.pop(i)
-                continue
-            i += 2
-        return lines
-    
-    lines = correct_list(pre_lines)
-    # Initializing lists to hold the data
-    time_stamps = []
-    texts = []
-    word_counts = []
-    durations = []
-    num_fillers = []
-    # List of filler words
-    filler_words = ['uh', 'um']
-    unique_words = set()  # Set to hold unique words
-    num_unique_words = []
-    
-    # Processing the lines
-    for i in range(0, len(lines), 2):
-        time_str = lines[i]
-        text = lines[i+1]
-        # Convert time to datetime object
-        if len(time_str.split(':'))==2:
-            time_obj = datetime.strptime('00:' + time_str, '%H:%M:%S')
-        else:
-            time_obj = datetime.strptime(time_str, '%H:%M:%S')
-        # Count the number of words
-        text = re.sub(r'\[.*?\]', '', text)  # Remove words in square brackets
-        text = re.sub(r'\(.*?\)', '', text)  # Remove words in round brackets
-        word_count = len(text.split())
-    
-        # Count the number of filler words
-        filler_count = sum(text.split().count(filler) for filler in filler_words)
-    
-        # Add words to the set of unique words
-        words_in_text = text.split()
-        unique_words.update(words_in_text)
-        
-        # Append the data to lists
-        time_stamps.append(time_obj)
-        texts.append(text)
-        word_counts.append(word_count)
-        num_fillers.append(filler_count)
-        num_unique_words.append(len(unique_words))
-    
-        # Calculate duration between current and previous timestamp
-        if i >= len(lines)-2:
-            durations.append(0)  # No previous segment for the first one
-        else:
-            if len(lines[i+2].split(':'))==2:
-                next_time_obj = datetime.strptime('00:' + lines[i+2], '%H:%M:%S')
-            else:
-                next_time_obj = datetime.strptime(lines[i+2], '%H:%M:%S')
-            duration = (next_time_obj - time_obj).seconds
-            durations.append(duration)
-    
-    # Creating the DataFrame
-    df = pd.DataFrame({
-        'time': time_stamps,
-        'text': texts,
-        'num_words': word_counts,
-        'num_fillers': num_fillers,
-        'duration': durations,
-        'num_unique_words': num_unique_words
-    })
-    df['duration_clean'] = df.apply(lambda row: row['duration'] if 0 < row['duration'] <= (row['num_words'] + 3) else (row['num_words']*1), axis=1)
-    df['cumulative_num_fillers'] = df['num_fillers'].cumsum()
-    df['cumulative_num_words'] = df['num_words'].cumsum()
-    df['cumulative_duration_clean'] = df['duration_clean'].cumsum()
-    df['pace']=df['cumulative_num_words']/df['cumulative_duration_clean'] * 60.0
-    df['fillers_share']=df['cumulative_num_fillers']/df['cumulative_num_words']
-    df['rolling_avg_pace'] = df['num_words'].rolling(window=12).mean() / df['duration_clean'].rolling(window=12).mean() * 60.0
-
-    # Total duration
-    total_duration = df['time'].iloc[-1] - df['time'].iloc[0]
-    total_duration_str = str(total_duration)
-    if "days" in total_duration_str:
-        total_duration_str = total_duration_str.split("days")[1]  # Remove the "0 days" part
-    
-    # Clean duration (no silence)
-    clean_duration_seconds = int(df['cumulative_duration_clean'].iloc[-1])
-    clean_duration = timedelta(seconds=clean_duration_seconds)
-    clean_duration_minutes = int(clean_duration_seconds/60.0)
-    
-    # Number of unique words (vocabulary)
-    num_unique_words_value = df['num_unique_words'].iloc[-1]
-    
-    # Words per minute (pace)
-    words_per_minute = df['pace'].iloc[-1]
-    
-    # Max pace
-    max_pace = df['rolling_avg_pace'].max()
-    
-    # Min pace
-    min_pace = df['rolling_avg_pace'].min()
-    
-    # Percent of fillers in speech
-    percent_fillers = df['fillers_share'].iloc[-1] * 100  # Convert to percentage
-    
-    # Print the information
-    # st.write(f"**Total Duration:** {total_duration_str}")
-    # st.write(f"**Clean Duration (no silence):** {clean_duration}")
-    # st.write(f"**Number of Unique Words (Vocabulary):** {num_unique_words_value}")
-    # st.write(f"**Words per Minute (Pace):** {words_per_minute:.1f}")
-    # st.write(f"**Max Pace:** {max_pace:.1f}")
-    # st.write(f"**Min Pace:** {min_pace:.1f}")
-    # st.write(f"**Percent of Fillers in Speech:** {percent_fillers:.2f}%")
-    # st.write(f"**List of Fillers:** {', '.join(filler_words)}")
-
-    # Setting up the Seaborn theme
-    sns.set_theme(style="darkgrid")
-
-    # Create a 2x2 grid for the plots
-    fig, axes = plt.subplots(2, 2, figsize=(20, 16))
-
-    # Plot 1: Pace and Rolling Average Pace
-    sns.lineplot(ax=axes[0, 0], x='time', y='pace', data=df, color='black')
-    # marker=False, linewidth=2.5, color='royalblue', label='Pace'
-    sns.lineplot(ax=axes[0, 0], x='time', y='rolling_avg_pace', data=df,  color='gray', linestyle=':')
-    # marker=False, linestyle='--', linewidth=2.5, color='orange', label='Rolling Avg Pace'
-    axes[0, 0].set_title('Cumulative pace and moving average with a one-minute window', fontsize=14, weight='bold')
-    axes[0, 0].set_xlabel('Time', fontsize=12)
-    axes[0, 0].set_ylabel('Words per minute', fontsize=12)
-    # axes[0, 0].legend()
-    # axes[0, 0].legend(loc='center', bbox_to_anchor=(0.85, 0.85), frameon=False)
-
-    wpm_data = {
-        "CEFR Level": ["A1", "A2", "B1", "B2", "C1", "C2", "Rap God"],
-        "Average WPM": [30, 50, 75, 105, 135, 165, 257]
-    }
-
-    colors = sns.color_palette("Oranges", len(wpm_data["Average WPM"]))
-
-    for i, (level, wpm) in enumerate(zip(wpm_data["CEFR Level"], wpm_data["Average WPM"])):
-        axes[0, 0].axhline(y=wpm, color=colors[i], linestyle='-', label=f'{level} - {wpm} WPM')
-        axes[0, 0].text(x=df['time'].max(), y=wpm, s=f'{level} - {wpm} WPM', 
-                        color=colors[i], va='bottom')
-    # axes[0, 0].legend(loc='upper left', bbox_to_anchor=(1, 1))
-
-    # Plot 2: Number of Unique Words Over Time
-    # ________________________________________________________________________
-    # Data for the native English teacher
-    teacher_data_minutes = np.array([0, 5, 10, 15, 20, 30, 60, 120, 180])
-    teacher_data_words = np.array([0, 318, 500, 638, 767, 1000, 1450, 2250, 2800])
-
-    # Create an interpolation function based on the teacher's data
-    interpolate_teacher = interp1d(teacher_data_minutes, teacher_data_words, kind='cubic')
-
-    # Define the monologue lengths for plotting
-    monologue_lengths_fine = np.linspace(0, 180, 100)
-
-    # Convert minutes to datetime for alignment with the original plot's x-axis
-    base_time = pd.to_datetime("1900-01-01 00:00:00")
-    time_as_datetime = [base_time + pd.Timedelta(minutes=m) for m in monologue_lengths_fine]
-
-    # Define scaling factors for each CEFR level based on expected differences
-    scaling_factors = {
-        "A1": 0.2,
-        "A2": 0.3,
-        "B1": 0.4,
-        "B2": 0.6,
-        "C1": 0.8,
-        "C2": 1.0,
-        "Rap God": 2.0, 
-    }
-
-    # Get the min and max time from the original data
-    min_time = df['time'].min()
-    max_time = df['time'].max()
-
-    # Filter the interpolated curves to match the original x-axis time range
-    time_as_datetime_filtered = [t for t in time_as_datetime if min_time <= t <= max_time]
-    monologue_lengths_filtered = [m for t, m in zip(time_as_datetime, monologue_lengths_fine) if min_time <= t <= max_time]
-
-    # Use the "Oranges" color palette for the lines
-    colors = sns.color_palette("Oranges", len(scaling_factors))
-
-    sns.lineplot(ax=axes[0, 1], x='time', y='num_unique_words', data=df, color='black')
-    # marker='o', linewidth=2.5,
-    axes[0, 1].set_title('Number of unique words over time (vocabulary)', fontsize=14, weight='bold')
-    axes[0, 1].set_xlabel('Time', fontsize=12)
-    axes[0, 1].set_ylabel('Unique Words', fontsize=12)
-
-    # Add interpolated curves for each CEFR level, aligning time axis to original datetime x-axis
-    for i, (level, scale) in enumerate(scaling_factors.items()):
-        scaled_words = interpolate_teacher(monologue_lengths_filtered) * scale
-        # Apply color from the palette for each line
-        axes[0, 1].plot(time_as_datetime_filtered, scaled_words, label=level, linestyle='-', color=colors[i])
-
-        # Add text near each line to label them
-        axes[0, 1].text(time_as_datetime_filtered[-1], scaled_words[-1], f'{level}', color=colors[i], va='center')
-
-
-    # ________________________________________________________________________
-    # Plot 3: Filler Word Share Over Time
-    sns.lineplot(ax=axes[1, 0], x='time', y='fillers_share', data=df, color='black')
-    # marker='o', linewidth=2.5,
-    axes[1, 0].set_title('Cumulative filler word share over time', fontsize=14, weight='bold')
-    axes[1, 0].set_xlabel('Time', fontsize=12)
-    axes[1, 0].set_ylabel('Share', fontsize=12)
-
-    colors = sns.color_palette("Oranges", len(wpm_data["Average WPM"]))
-    axes[1, 0].axhline(y=0.2, color=colors[-1], linestyle='-', label='20% level')
-    axes[1, 0].text(x=df['time'].max(), y=0.2, s='20% level', 
-                        color=colors[-1], va='bottom')
-
-    def format_time(x, pos=None):
-        return x.strftime('%H:%M:%S')
-
-    # Format x-ticks to show only the time (H:M:S)
-    axes[1, 0].xaxis.set_major_formatter(FuncFormatter(lambda x, _: mdates.num2date(x).strftime('%H:%M:%S')))
-    axes[0, 0].xaxis.set_major_formatter(FuncFormatter(lambda x, _: mdates.num2date(x).strftime('%H:%M:%S')))
-    axes[0, 1].xaxis.set_major_formatter(FuncFormatter(lambda x, _: mdates.num2date(x).strftime('%H:%M:%S')))
-
-    # Plot 4: Word Cloud of Unique Words
-    # Combine all text into one string
-    all_text = ' '.join(df['text'])
-
-    # Generate the Word Cloud with a larger size
-    wordcloud = WordCloud(width=1200, height=900, background_color='white').generate(all_text)
-
-    # Display the Word Cloud in the bottom right subplot
-    axes[1, 1].imshow(wordcloud, interpolation='bilinear')
-    axes[1, 1].axis('off')  # Hide axes
-    axes[1, 1].set_title('Word frequency', fontsize=14, weight='bold')
-
-    # Adjust layout to avoid overlap
-    plt.tight_layout()
-
-    # Display the plots
-    st.pyplot(fig)
-
-    # Create a DataFrame to display the information in a table
-    info_data = {
-        "Metric": [
-            "Total Duration",
-            "Speaking Duration",
-            "Minutes",
-            "Unique Words",
-            "WPM",
-            "Max WPM",
-            "Min WPM",
-            "Fillers Percentage",
-            "List of Fillers"
-        ],
-        "Value": [
-            total_duration_str,
-            clean_duration,
-            clean_duration_minutes,
-            num_unique_words_value,
-            f"{words_per_minute:.1f}",
-            f"{max_pace:.1f}",
-            f"{min_pace:.1f}",
-            f"{percent_fillers:.2f}%",
-            ', '.join(filler_words)
-        ]
-    }
-    
-    info_df = pd.DataFrame(info_data).T
-    # Display the table
-    # st.table(info_df)
+    key = transcript_key(input_text, window, tuple(filler_words))
+    diagnostics = None
+    if show_diagnostics:
+        diagnostics_logging()
+        diagnostics = Diagnostics(key=key, window=window)
+    # Live sessions paste a growing transcript; pasted text is analyzed incrementally
+    incremental = incremental_analyzer(window, filler_words) if isinstance(input_text, str) else None
+    try:
+        with stage(diagnostics, 'analyze', len(input_text)):
+            result = analyze_transcript(key, input_text, window, filler_words, diagnostics, incremental)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    skipped = result.parse_stats.skipped
+    if skipped:
+        st.caption("Skipped lines: " + ", ".join(f"{count} {reason}" for reason, count in skipped.most_common()))
+
+    # The cheap outputs first: level range and summary table
+    st.write(f"**Language Level Range:** {result.language_level_range}")
     st.write("")  # Adds a blank line (space)
-    #############################################################
-
-    # Function to map unique words to CEFR level based on the interpolation
-    def max_get_vocab_cefr_level(num_unique_words, duration_minutes):
-        scaled_vocab = {level: interpolate_teacher(duration_minutes) * scale for level, scale in scaling_factors.items()}
-        for level, vocab_threshold in scaled_vocab.items():
-            if num_unique_words <= vocab_threshold:
-                return level
-        return "Native"
-    def min_get_vocab_cefr_level(num_unique_words, duration_minutes):
-        scaled_vocab = {level: interpolate_teacher(duration_minutes) * scale for level, scale in scaling_factors.items()}
-        for level, vocab_threshold in scaled_vocab.items():
-            if num_unique_words >= vocab_threshold:
-                current_level = level
-            else:
-                return current_level
-        return "C2"  # Default to C2 if beyond the range
-    
-    # Define CEFR levels for words per minute (WPM)
-    wpm_levels = {
-        "A1": 30,
-        "A2": 50,
-        "B1": 75,
-        "B2": 105,
-        "C1": 135,
-        "C2": 165
-    }
-    
-    # Function to map WPM to CEFR level
-    def max_get_cefr_level(value, levels_dict):
-        for level, threshold in levels_dict.items():
-            if value <= threshold:
-                return level
-        return "Native"  # Highest level
-    def min_get_cefr_level(value, levels_dict):
-        for level, threshold in levels_dict.items():
-            if value >= threshold:
-                current_level = level
-            else:
-                return current_level
-        return "C2"  # Highest level
-    
-    # Calculate the minimum and maximum levels for num_unique_words_value and words_per_minute
-    min_level = min(min_get_vocab_cefr_level(num_unique_words_value, clean_duration_minutes), 
-                    min_get_cefr_level(words_per_minute, wpm_levels))
-    
-    max_level = max(max_get_vocab_cefr_level(num_unique_words_value, clean_duration_minutes), 
-                    max_get_cefr_level(words_per_minute, wpm_levels))
-    if max_level == "Rap God":
-        max_level = "Native"
-    # Output the language level range in the format "A2 - B1"
-    language_level_range = f"{min_level} - {max_level}"
-    st.write(f"**Language Level Range:** {language_level_range}")
-
-    #############################################################
-    # Create a DataFrame to display the information in a table
-    info_data = {
-        "Metric": [
-            "Total Duration",
-            "Speaking Duration",
-            "Minutes",
-            "Unique Words",
-            "WPM",
-            "Level",
-            "Max WPM",
-            "Min WPM",
-            "Fillers Percentage",
-            "List of Fillers"
-        ],
-        "Value": [
-            total_duration_str,
-            clean_duration,
-            clean_duration_minutes,
-            num_unique_words_value,
-            f"{words_per_minute:.1f}",
-            language_level_range,
-            f"{max_pace:.1f}",
-            f"{min_pace:.1f}",
-            f"{percent_fillers:.2f}%",
-            ', '.join(filler_words)
-        ]
-    }
-    
-    info_df = pd.DataFrame(info_data).T
-    
+    with stage(diagnostics, 'summary'):
+        st.write(summary_html(key, result), unsafe_allow_html=True)
     st.write("")  # Adds a blank line (space)
-    st.write(info_df.to_html(index=False), unsafe_allow_html=True)
+    if result.filler_matches:
+        st.write("**Fillers**")
+        st.write(result.filler_breakdown().to_html(index=False), unsafe_allow_html=True)
+        st.write("")  # Adds a blank line (space)
+    if history_user and st.sidebar.button("Save this session"):
+        history.add(history_user, key, result)
+        st.sidebar.success("Saved.")
+
+    charts = CHARTS
+    if len(result.df) > LARGE_TRANSCRIPT_SEGMENTS:
+        word_chart = st.radio(
+            "This is a long transcript; word frequency chart:",
+            ["Top words", "Word cloud"],
+            horizontal=True
+        )
+        if word_chart == "Top words":
+            charts = (*CHARTS[:3], TOP_WORDS)
+
+    # Then a placeholder per chart, filled in as soon as that chart is rendered
+    placeholders = {}
+    full_wordcloud = False
+    for row in (charts[:2], charts[2:]):
+        for chart, column in zip(row, st.columns(2)):
+            placeholders[chart] = column.empty()
+            if chart == "wordcloud":
+                full_wordcloud = column.toggle("Full-resolution word cloud")
+    # Where in the session the level rises or drops
+    placeholders[TIMELINE] = st.empty()
+    for placeholder in placeholders.values():
+        placeholder.caption("Rendering…")
+
+    with stage(diagnostics, 'charts'):
+        rendered = (charts[3], *charts[:3], TIMELINE)
+        if chart_mode == "Interactive":
+            from fluency.vega import fillers_spec, pace_spec, vocabulary_spec
+
+            # Line charts go to the browser as Vega-Lite specs; only the rest is rendered here
+            for chart, build in zip(CHARTS[:3], (pace_spec, vocabulary_spec, fillers_spec)):
+                with stage(diagnostics, f"{chart} spec"):
+                    try:
+                        placeholders[chart].vega_lite_chart(build(result), width="stretch")
+                    except Exception as e:
+                        placeholders[chart].error(f"This chart could not be drawn: {e}")
+            rendered = (charts[3], TIMELINE)
+        from fluency.timeline import level_timeline
+
+        # A few vectorized operations; empty when no window has speech, e.g. only [Music] or (Applause)
+        if level_timeline(result.df).empty:
+            placeholders[TIMELINE].caption("No speech to show on the level timeline.")
+            rendered = tuple(chart for chart in rendered if chart != TIMELINE)
+
+        cache, store = chart_cache(), result_store()
+        # The word frequency chart is the slowest, so it starts first
+        pending = {}
+        for chart in rendered:
+            chart_diagnostics = Diagnostics(**diagnostics.context) if diagnostics else None
+            future = render_pool().submit(
+                render_chart, key, result, chart, cache, store, chart_diagnostics, full_wordcloud
+            )
+            pending[future] = chart, chart_diagnostics
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chart, chart_diagnostics = pending.pop(future)
+                # One chart that fails to draw must not take the rest of the page with it
+                try:
+                    placeholders[chart].image(future.result(), width="stretch")
+                except Exception as e:
+                    placeholders[chart].error(f"This chart could not be drawn: {e}")
+                if diagnostics is not None:
+                    diagnostics.merge(chart_diagnostics)
+
+    if diagnostics is not None:
+        with st.expander(f"Diagnostics: {diagnostics.total_seconds():.3f} s"):
+            st.caption("Nested stages missing from the list were served from cache. "
+                       "Blocks is the change in allocated memory blocks; collections counts garbage collections.")
+            st.table([
+                {
+                    "Stage": " " * record['depth'] + record['stage'],
+                    "Seconds": f"{record['seconds']:.4f}",
+                    "Input size": "" if record['size'] is None else f"{record['size']:,}",
+                    "Blocks": f"{record['blocks']:+,}",
+                    "Collections": record['collections'],
+                }
+                for record in diagnostics.records
+            ])
+
+if compared:
+    labels = [label for label, _ in compared]
+    keys = [transcript_key(source, window, tuple(filler_words)) for _, source in compared]
+    with st.spinner("Analyzing…"):
+        analyzed = compare_transcripts(keys, [source for _, source in compared], window, filler_words)
+    for label, (_, error) in zip(labels, analyzed):
+        if error is not None:
+            st.error(f"{label}: {error}")
+    shown = [(label, result) for label, (result, _) in zip(labels, analyzed) if result is not None]
+    if shown:
+        from fluency.compare import comparison_frame
+        from fluency.vega import comparison_spec
+
+        labels, results = zip(*shown)
+        st.write(comparison_frame(labels, results).to_html(index=False), unsafe_allow_html=True)
+        st.write("")  # Adds a blank line (space)
+        # Every transcript's curve on the same axes, with the level reference lines
+        for chart in CHARTS[:3]:
+            st.vega_lite_chart(comparison_spec(chart, labels, results), width="stretch")
+
+if history_user:
+    # Only the saved summaries are read, so this stays quick with hundreds of sessions
+    sessions = history.sessions(history_user)
     st.write("")  # Adds a blank line (space)
+    st.subheader("Progress")
+    if sessions:
+        from fluency.vega import progress_spec
+
+        st.vega_lite_chart(progress_spec(sessions), width="stretch")
+    else:
+        st.caption("No saved sessions yet: analyze a transcript and click \"Save this session\".")
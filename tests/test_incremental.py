@@ -0,0 +1,69 @@
+"""IncrementalAnalyzer must give the same result as a full analysis of the same text."""
+import random
+
+import pandas as pd
+import pytest
+
+from fluency.bench import synthetic_transcript
+from fluency.engine import analyze
+from fluency.fillers import LEXICONS
+from fluency.incremental import IncrementalAnalyzer
+
+FILLERS = LEXICONS['en']
+
+
+def transcripts():
+    text = synthetic_transcript(8, filler_rate=0.05, seed=1)
+    # Multi-word fillers across segment boundaries, and a line separator inside a line
+    text += '9:00\nso you\n9:02\nknow what i mean\n9:04\nhello there\u2028friend\n'
+    return {'lf': text, 'crlf': text.replace('\n', '\r\n')}
+
+
+def outcome(update, text):
+    try:
+        result = update(text)
+    except ValueError as e:
+        return str(e)
+    stats = result.parse_stats
+    return (
+        result.summary(), (stats.lines, stats.segments, dict(stats.skipped)), result.df,
+        result.filler_matches, result.word_frequencies,
+    )
+
+
+def assert_same(incremental, full):
+    assert type(incremental) is type(full)
+    if isinstance(full, str):
+        assert incremental == full
+        return
+    *head, df, matches, frequencies = incremental
+    *full_head, full_df, full_matches, full_frequencies = full
+    assert head == full_head
+    pd.testing.assert_frame_equal(df, full_df)
+    assert matches == full_matches
+    assert frequencies == full_frequencies
+
+
+@pytest.mark.parametrize('name', ['lf', 'crlf'])
+def test_random_cuts_match_full_analysis(name):
+    text = transcripts()[name]
+    cuts = sorted(random.Random(name).sample(range(1, len(text)), 40)) + [len(text)]
+    analyzer = IncrementalAnalyzer(FILLERS)
+    for cut in cuts:
+        prefix = text[:cut]
+        assert_same(outcome(analyzer.update, prefix), outcome(lambda t: analyze(t, FILLERS), prefix))
+
+
+def test_edit_starts_over():
+    text = transcripts()['lf']
+    analyzer = IncrementalAnalyzer(FILLERS)
+    analyzer.update(text)
+    edited = text.replace('so you', 'so', 1)
+    assert_same(outcome(analyzer.update, edited), outcome(lambda t: analyze(t, FILLERS), edited))
+
+
+def test_caption_file_after_ambiguous_prefix():
+    srt = '1\n00:00:01,000 --> 00:00:03,000\nso you know\n\n2\n00:00:04,000 --> 00:00:06,000\nhello there\n'
+    analyzer = IncrementalAnalyzer(FILLERS)
+    outcome(analyzer.update, '1\n')
+    assert_same(outcome(analyzer.update, srt), outcome(lambda t: analyze(t, FILLERS), srt))